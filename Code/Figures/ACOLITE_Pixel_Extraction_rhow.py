@@ -1,115 +1,210 @@
-# -----------------------------Header information------------------------------
-# Author: Ali Reza Shahvaran
-# Filename: ACOLITE_Pixel_Extraction_rhow.py
-# License: CC BY 4.0
-# ----------------------------------------------------------------------------
-# Description: This script is designed for extracting remote sensing data from raster files. It maps column names to specific raster file names, adjusts mappings for different sensors (L8 and L9), and includes functions for transforming image data. The script is likely used for processing satellite imagery data, particularly focusing on specific wavelengths represented in the raster files.
-# ----------------------------------------------------------------------------
-# Programming Language: Python 3.0
-# Libraries: os, pandas, fnmatch, rasterio, pyproj, numpy
-# ----------------------------------------------------------------------------
-# Input: The script processes raster files (e.g., 'rhow_443.tif', 'rhow_483.tif') located in a specified directory. It likely reads data from these files to perform its operations.
-# ----------------------------------------------------------------------------
-# Output: The specific output of the script is not directly indicated in the initial part of the code. However, it may involve generating transformed data or summaries based on the input raster files.
-# ----------------------------------------------------------------------------
-
-import os
-import pandas as pd
-import fnmatch
-import rasterio
-from rasterio.warp import transform
-from pyproj import Proj
-import numpy as np
-from pyproj import Transformer
-
-# Define the mapping for column names to file names
-raster_file_mapping = {
-    "rhow_443": "rhow_443.tif",
-    "rhow_483": "rhow_483.tif",  # This is the default for L8
-    "rhow_561": "rhow_561.tif",
-    "rhow_655": "rhow_655.tif",  # This is the default for L8
-    "rhow_865": "rhow_865.tif",
-}
-
-# Adjust the mapping for L9 sensor
-raster_file_mapping_L9 = raster_file_mapping.copy()
-raster_file_mapping_L9["rhow_483"] = "rhow_482.tif"  # L9 specific file name
-raster_file_mapping_L9["rhow_655"] = "rhow_654.tif"  # L9 specific file name
-
-def image_to_folder(image):
-    parts = image.split('_')
-    sensor = 'L8' if parts[0] == 'LC08' else 'L9' if parts[0] == 'LC09' else None
-    date = parts[3][:4] + '_' + parts[3][4:6] + '_' + parts[3][6:]
-    return f"{sensor}_OLI_{date}_*_{parts[2]}_L2W"
-
-from pyproj import Transformer
-
-def get_pixel_value(raster_path, lon, lat):
-    with rasterio.open(raster_path) as src:
-        # Create a transformer object for coordinate transformation
-        transformer = Transformer.from_crs("epsg:4326", src.crs, always_xy=True)
-        # Perform the transformation
-        x, y = transformer.transform(lon, lat)
-        
-        # Get row and col indices
-        row, col = src.index(x, y)
-        data = src.read(1)  # Read the first band
-
-        # Initialize a list to collect pixel values
-        pixel_values = []
-
-        # Iterate over the 3x3 grid
-        for d_row in range(-1, 2):
-            for d_col in range(-1, 2):
-                # Calculate the new row and col positions
-                new_row, new_col = row + d_row, col + d_col
-                if (0 <= new_row < src.height) and (0 <= new_col < src.width):
-                    # Get the pixel value at the new position
-                    pixel_value = data[new_row, new_col]
-                    # If pixel value is not NaN, append to list
-                    if not np.isnan(pixel_value):
-                        pixel_values.append(pixel_value)
-        
-        # Calculate the average if there are valid pixels
-        if pixel_values:
-            return np.mean(pixel_values)
-        else:
-            return None  # Return None if no valid pixels are found
-
-# Base directory where the folders are located
-base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\ACOLITE_Outputs"
-
-# Reading the Excel file
-df = pd.read_excel("C:\\Users\\PHYS3009\\Desktop\\ACOLITE_Pixel_Extraction_rhow\Matchup_Data_v1.xlsx")
-
-# Adding new columns for the raster values
-raster_columns = ["rhow_443", "rhow_483", "rhow_561", "rhow_655", "rhow_865"]
-for column in raster_columns:
-    df[column] = np.nan
-
-# Iterate over the dataframe
-for index, row in df.iterrows():
-    image_val = row['Image']
-    folder_name_pattern = image_to_folder(image_val)
-    
-    # Determine which set of raster file names to use based on the sensor
-    current_raster_mapping = raster_file_mapping_L9 if 'L9' in folder_name_pattern else raster_file_mapping
-
-    # Search for corresponding directory
-    for root, dirs, files in os.walk(base_dir):
-        for dirname in dirs:
-            if fnmatch.fnmatch(dirname, folder_name_pattern):
-                directory_path = os.path.join(root, dirname)
-                # Extract pixel values for each raster
-                for column_name in raster_columns:
-                    # Use the mapping to get the correct file name
-                    raster_file_name = current_raster_mapping[column_name]
-                    raster_path = os.path.join(directory_path, raster_file_name)
-                    if os.path.exists(raster_path):
-                        value = get_pixel_value(raster_path, row['Longitude_DD'], row['Latitude_DD'])
-                        df.at[index, column_name] = value
-                break
-
-# Save the dataframe to a new Excel file
-output_file = "C:\\Users\\PHYS3009\\Desktop\\ACOLITE_Pixel_Extraction_rhow\Matchup_Data_v2.xlsx"
-df.to_excel(output_file, index=False)
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: ACOLITE_Pixel_Extraction_rhow.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script is designed for extracting remote sensing data from raster files. It maps column names to specific raster file names, adjusts mappings for different sensors (L8 and L9), and includes functions for transforming image data. The script is likely used for processing satellite imagery data, particularly focusing on specific wavelengths represented in the raster files. The matchup rows are grouped by scene and the scenes are processed in parallel; for each band, one windowed read covers the neighbourhoods of all points of the scene. sample_points returns a table of window statistics (mean, median, std, CV and number of valid pixels, optionally a bilinear value) for any points, scenes and bands.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, sys, pandas, rasterio, pyproj, numpy, concurrent.futures, Scene_Catalog
+# ----------------------------------------------------------------------------
+# Input: The script processes raster files (e.g., 'rhow_443.tif', 'rhow_483.tif') located in a specified directory. It likely reads data from these files to perform its operations.
+# ----------------------------------------------------------------------------
+# Output: The specific output of the script is not directly indicated in the initial part of the code. However, it may involve generating transformed data or summaries based on the input raster files.
+# ----------------------------------------------------------------------------
+
+import os
+import sys
+import pandas as pd
+import rasterio
+from rasterio.windows import Window
+import numpy as np
+from pyproj import Transformer
+from concurrent.futures import ProcessPoolExecutor
+
+# Scene_Catalog.py is in the Preprocessing_and_Processing folder
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Preprocessing_and_Processing"))
+import Scene_Catalog
+
+# Define the mapping for column names to file names
+raster_file_mapping = {
+    "rhow_443": "rhow_443.tif",
+    "rhow_483": "rhow_483.tif",  # This is the default for L8
+    "rhow_561": "rhow_561.tif",
+    "rhow_655": "rhow_655.tif",  # This is the default for L8
+    "rhow_865": "rhow_865.tif",
+}
+
+# Adjust the mapping for L9 sensor
+raster_file_mapping_L9 = raster_file_mapping.copy()
+raster_file_mapping_L9["rhow_483"] = "rhow_482.tif"  # L9 specific file name
+raster_file_mapping_L9["rhow_655"] = "rhow_654.tif"  # L9 specific file name
+
+# Base directory where the folders are located
+base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\ACOLITE_Outputs"
+
+# Matchup spreadsheets (input and output)
+input_file = "C:\\Users\\PHYS3009\\Desktop\\ACOLITE_Pixel_Extraction_rhow\\Matchup_Data_v1.xlsx"
+output_file = "C:\\Users\\PHYS3009\\Desktop\\ACOLITE_Pixel_Extraction_rhow\\Matchup_Data_v2.xlsx"
+
+# Columns added for the raster values
+raster_columns = ["rhow_443", "rhow_483", "rhow_561", "rhow_655", "rhow_865"]
+
+# Size (in pixels) of the square window around each point
+window_size = 3
+
+# Number of scenes processed at the same time (None uses all available cores)
+max_workers = None
+
+# Transformers from WGS 84 to each raster CRS, created once per process
+transformer_cache = {}
+
+def get_transformer(crs):
+    key = str(crs)
+    if key not in transformer_cache:
+        transformer_cache[key] = Transformer.from_crs("epsg:4326", crs, always_xy=True)
+    return transformer_cache[key]
+
+def point_windows(src, lons, lats, size=window_size):
+    # Fractional row and column of every point on the raster grid, and the smallest window holding all of their neighbourhoods
+    x, y = get_transformer(src.crs).transform(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+    cols, rows = ~src.transform * (np.asarray(x), np.asarray(y))
+    cols, rows = np.atleast_1d(cols), np.atleast_1d(rows)
+    # At least one pixel around the points, for the bilinear interpolation
+    half = max(size // 2, 1)
+    pixel_rows, pixel_cols = np.floor(rows).astype(int), np.floor(cols).astype(int)
+    row_start, row_stop = max(pixel_rows.min() - half, 0), min(pixel_rows.max() + half + 1, src.height)
+    col_start, col_stop = max(pixel_cols.min() - half, 0), min(pixel_cols.max() + half + 1, src.width)
+    if row_start >= row_stop or col_start >= col_stop:
+        return rows, cols, None
+    return rows, cols, Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+
+def gather(data, window, rows, cols):
+    # Pixel values at integer rows and columns of the raster; pixels outside the window (i.e. outside the raster) are NaN
+    rows, cols = rows - window.row_off, cols - window.col_off
+    inside = (rows >= 0) & (rows < data.shape[0]) & (cols >= 0) & (cols < data.shape[1])
+    values = np.full(rows.shape, np.nan, dtype=np.float64)
+    values[inside] = data[rows[inside], cols[inside]]
+    return values
+
+def window_statistics(data, window, rows, cols, size=window_size):
+    # Statistics of the valid pixels in the size x size neighbourhood of every point (NaN when there is none)
+    half = size // 2
+    offsets = np.arange(-half, size - half)
+    pixel_rows, pixel_cols = np.floor(rows).astype(int), np.floor(cols).astype(int)
+    shape = (len(pixel_rows), size, size)
+    neighbour_rows = np.broadcast_to(pixel_rows[:, None, None] + offsets[None, :, None], shape)
+    neighbour_cols = np.broadcast_to(pixel_cols[:, None, None] + offsets[None, None, :], shape)
+    values = gather(data, window, neighbour_rows, neighbour_cols).reshape(len(pixel_rows), -1)
+
+    count = np.count_nonzero(~np.isnan(values), axis=1)
+    observed = count > 0
+    # Rows without a valid pixel are filled with zeros so the NaN functions do not warn; they are set to NaN afterwards
+    values[~observed] = 0
+    mean = np.nanmean(values, axis=1)
+    std = np.nanstd(values, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cv = std / mean
+    return {
+        "mean": np.where(observed, mean, np.nan),
+        "median": np.where(observed, np.nanmedian(values, axis=1), np.nan),
+        "std": np.where(observed, std, np.nan),
+        "cv": np.where(observed, cv, np.nan),
+        "count": count,
+    }
+
+def bilinear_values(data, window, rows, cols):
+    # Bilinear interpolation between the four pixel centres around every point, weighted over the valid pixels only
+    v, u = rows - 0.5, cols - 0.5
+    row0, col0 = np.floor(v).astype(int), np.floor(u).astype(int)
+    dy, dx = v - row0, u - col0
+    corners = [(row0, col0, (1 - dy) * (1 - dx)), (row0, col0 + 1, (1 - dy) * dx),
+               (row0 + 1, col0, dy * (1 - dx)), (row0 + 1, col0 + 1, dy * dx)]
+    values = np.stack([gather(data, window, r, c) for r, c, w in corners])
+    weights = np.stack([w for r, c, w in corners])
+    weights[np.isnan(values)] = 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = np.nansum(values * weights, axis=0) / weights.sum(axis=0)
+    return np.where(weights.sum(axis=0) > 0, result, np.nan)
+
+def band_file(directory_path, band):
+    # Raster file of a band in an L2W folder (L9 scenes use their own names for the 483 and 655 nm bands)
+    raster_mapping = raster_file_mapping_L9 if os.path.basename(directory_path).startswith('L9') else raster_file_mapping
+    return os.path.join(directory_path, raster_mapping.get(band, f"{band}.tif"))
+
+def sample_scene(directory_path, points, lons, lats, bands=raster_columns, size=window_size, bilinear=False):
+    # Window statistics of all bands at all points of one scene, with a single windowed read per band
+    tables = []
+    for band in bands:
+        raster_path = band_file(directory_path, band)
+        if not os.path.exists(raster_path):
+            continue
+        try:
+            with rasterio.open(raster_path) as src:
+                rows, cols, window = point_windows(src, lons, lats, size)
+                if window is None:
+                    continue
+                data = src.read(1, window=window)
+            table = pd.DataFrame(window_statistics(data, window, rows, cols, size))
+            if bilinear:
+                table["bilinear"] = bilinear_values(data, window, rows, cols)
+            table.insert(0, "point", points)
+            table.insert(1, "scene", os.path.basename(directory_path))
+            table.insert(2, "band", band)
+            tables.append(table)
+        except Exception as e:
+            print(f"Error processing file: {raster_path}, Error: {e}")
+    return tables
+
+def scene_groups(scene_ids, directory=base_dir):
+    # Positions of the points grouped by their L2W folder (same sensor, path/row and date as the scene ID)
+    Scene_Catalog.refresh([directory])
+    groups = {}
+    for scene_id, positions in pd.Series(scene_ids).groupby(pd.Series(scene_ids)).groups.items():
+        folders = Scene_Catalog.scenes_for_image(scene_id, directory, kind="dir", level="L2W")
+        if folders:
+            groups.setdefault(folders[0], []).extend(positions)
+        else:
+            print(f"No L2W folder found for {scene_id}")
+    return groups
+
+def sample_points(lons, lats, scene_ids, bands=raster_columns, size=window_size, bilinear=False,
+                  points=None, directory=base_dir, workers=max_workers):
+    # Tidy table of the window statistics (mean, median, std, cv, count and optionally bilinear) of every point and band
+    # scene_ids are Level-1 image IDs or ACOLITE scene names; points labels the rows (positions in the arrays by default)
+    lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+    points = np.arange(len(lons)) if points is None else np.asarray(points)
+    groups = scene_groups(np.asarray(scene_ids), directory)
+    folders = list(groups)
+    positions = [np.asarray(groups[folder]) for folder in folders]
+    count = len(folders)
+
+    # Process the scenes in parallel
+    tables = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for scene_tables in executor.map(sample_scene, folders, [points[p] for p in positions], [lons[p] for p in positions],
+                                         [lats[p] for p in positions], [bands] * count, [size] * count, [bilinear] * count):
+            tables.extend(scene_tables)
+    columns = ["point", "scene", "band", "mean", "median", "std", "cv", "count"] + (["bilinear"] if bilinear else [])
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=columns)
+
+def extract_matchups(df, directory=base_dir, size=window_size, workers=max_workers):
+    # Mean of the window around every matchup, one column per band
+    samples = sample_points(df['Longitude_DD'], df['Latitude_DD'], df['Image'], raster_columns, size,
+                            points=df.index, directory=directory, workers=workers)
+    means = samples.pivot(index="point", columns="band", values="mean")
+    for column in raster_columns:
+        df[column] = means[column].reindex(df.index) if column in means else np.nan
+    return df
+
+def main():
+    # Reading the Excel file
+    df = pd.read_excel(input_file)
+
+    df = extract_matchups(df)
+
+    # Save the dataframe to a new Excel file
+    df.to_excel(output_file, index=False)
+
+if __name__ == "__main__":
+    main()
@@ -1,204 +1,211 @@
-# -----------------------------Header information------------------------------
-# Author: Ali Reza Shahvaran
-# Filename: QA.py
-# License: CC BY 4.0
-# ----------------------------------------------------------------------------
-# Description: This script performs quality assurance analysis on raster data. It includes pixel value counting and data processing for quality assurance purposes.
-# ----------------------------------------------------------------------------
-# Programming Language: Python 3.0
-# Libraries: os, rasterio, pandas, numpy, openpyxl
-# ----------------------------------------------------------------------------
-# Input: Processes raster data from the directory "C:\\Users\\PHYS3009\\Desktop\\QA\\Inputs".
-# ----------------------------------------------------------------------------
-# Output: Results are saved to "QA_Results.xlsx" at "C:\\Users\\PHYS3009\\Desktop\\QA\\Outputs".
-# ----------------------------------------------------------------------------
-
-import os
-import rasterio
-import pandas as pd
-import numpy as np
-from openpyxl import load_workbook
-
-# Define directories and file paths for QA1
-input_directory = "C:\\Users\\PHYS3009\\Desktop\\QA\\Inputs"
-output_excel_path = "C:\\Users\\PHYS3009\\Desktop\\QA\\Outputs\\QA_Results.xlsx"
-
-# Collecting all unique pixel values across all files
-all_pixel_values = set()
-
-# Function to count the pixels for QA1
-def count_pixels(raster, value):
-    return (raster == value).sum()
-
-# Main logic of QA1.py
-for File_Name in os.listdir(input_directory):
-    if File_Name.endswith(".TIF"):
-        file_path = os.path.join(input_directory, File_Name)
-        
-        # Reading the raster data
-        with rasterio.open(file_path) as src:
-            raster = src.read(1)
-        
-        # Adding unique values to the set
-        all_pixel_values.update(np.unique(raster))
-
-# Sorting pixel values for column ordering
-columns = ['File_Name'] + sorted(list(all_pixel_values))
-
-# Creating a list to hold the results
-data = []
-
-# Looping through each file to count pixels for QA1
-for File_Name in os.listdir(input_directory):
-    if File_Name.endswith(".TIF"):
-        file_path = os.path.join(input_directory, File_Name)
-        
-        # Reading the raster data
-        with rasterio.open(file_path) as src:
-            raster = src.read(1)
-        
-        # Counting the pixels for each unique value
-        counts = {value: count_pixels(raster, value) for value in all_pixel_values}
-        
-        # Adding the results to the list
-        data.append({'File_Name': File_Name, **counts})
-
-# Creating a DataFrame from the list
-df_qa1 = pd.DataFrame(data, columns=columns)
-
-# Saving the DataFrame to an Excel file in a sheet named 'pixel_stats' without the index
-with pd.ExcelWriter(output_excel_path, engine='openpyxl') as writer:
-    df_qa1.to_excel(writer, sheet_name='pixel_stats', index=False)
-
-# Functions for QA2.py
-def interpret_binary(binary_string):
-    flags = {
-        "Fill": binary_string[15],
-        "Dilated_Cloud": binary_string[14],
-        "Cirrus": binary_string[13],
-        "Cloud": binary_string[12],
-        "Cloud_Shadow": binary_string[11],
-        "Snow": binary_string[10],
-        "Clear": binary_string[9],
-        "Water": binary_string[8],
-        "Cloud_Confidence": binary_string[6:8],
-        "Cloud_Shadow_Confidence": binary_string[4:6],
-        "Snow_Ice_Confidence": binary_string[2:4],
-        "Cirrus_Confidence": binary_string[0:2]
-    }
-    return flags
-
-def header_to_binary(header):
-    return format(int(header), '016b')
-
-# Main logic of QA2.py
-wb = load_workbook(output_excel_path)
-sheet = wb.active
-
-# Get headers (including the first numeric one)
-headers = [cell.value for cell in sheet[1]][1:]
-
-# Initialize interpreted_data as an empty list
-interpreted_data = []
-
-# Main logic of QA2.py
-for header in headers:  # Start processing from the first numeric header
-    binary_header = header_to_binary(header)
-    flags = interpret_binary(binary_header)
-    interpreted_data.append({"Original_Header": header, "Binary_Format": binary_header, **flags})
-
-
-# Creating a DataFrame from the interpreted data
-df_qa2 = pd.DataFrame(interpreted_data)
-
-# Saving the DataFrame of QA2.py to the same Excel file in a sheet named 'pixel_descr' without the index
-with pd.ExcelWriter(output_excel_path, engine='openpyxl', mode='a') as writer:
-    df_qa2.to_excel(writer, sheet_name='pixel_descr', index=False)
-
-# Step 1: Duplicate the pixel_stats DataFrame
-df_qa1_percentage = df_qa1.copy()
-
-# Step 2: Remove the first two columns ('File_Name' and '1')
-df_qa1_percentage.drop(columns=['File_Name', 1], inplace=True)
-
-# Step 3: Calculate the percentage of each cell relative to the sum of its row
-df_qa1_percentage = df_qa1_percentage.div(df_qa1_percentage.sum(axis=1), axis=0) * 100
-
-# Step 4: Reinsert the 'File_Name' column to the beginning of the DataFrame
-df_qa1_percentage.insert(0, 'File_Name', df_qa1['File_Name'])
-df_qa1_percentage = df_qa1_percentage.round(1)
-# Saving the DataFrame with percentage values to the Excel file
-with pd.ExcelWriter(output_excel_path, engine='openpyxl', mode='a') as writer:
-    df_qa1_percentage.to_excel(writer, sheet_name='pixel_stats2', index=False)
-    
-# Definitions for the new descriptions
-descriptions = {
-    "Fill": ["Image data", "Fill data"],
-    "Dilated_Cloud": ["Cloud is not dilated or no cloud", "Cloud dilation"],
-    "Cirrus": ["Cirrus confidence: no confidence level set or low confidence", "High confidence cirrus"],
-    "Cloud": ["Cloud confidence is not high", "High confidence cloud"],
-    "Cloud_Shadow": ["Cloud shadow confidence is not high", "High confidence cloud shadow"],
-    "Snow": ["Snow/Ice confidence is not high", "High confidence snow cover"],
-    "Clear": ["Cloud or dilated cloud bits are set", "Cloud and dilated cloud bits are not set"],
-    "Water": ["Land or cloud", "Water"],
-    "Cloud_Confidence": ["No confidence level set", "Low confidence", "Medium confidence", "High confidence"],
-    "Cloud_Shadow_Confidence": ["No confidence level set", "Low confidence", "Reserved", "High confidence"],
-    "Snow_Ice_Confidence": ["No confidence level set", "Low confidence", "Reserved", "High confidence"],
-    "Cirrus_Confidence": ["No confidence level set", "Low confidence", "Reserved", "High confidence"]
-}
-
-# Duplicating the pixel_descr DataFrame
-df_qa2_descr = df_qa2.copy()
-
-# Modifying the values according to the descriptions
-for column in descriptions.keys():
-    if column in ["Cloud_Confidence", "Cloud_Shadow_Confidence", "Snow_Ice_Confidence", "Cirrus_Confidence"]:
-        # Special handling for two-digit binary columns
-        mapping_dict = {
-            '00': descriptions[column][0],
-            '01': descriptions[column][1],
-            '10': descriptions[column][2],
-            '11': descriptions[column][3]
-        }
-        df_qa2_descr[column] = df_qa2[column].astype(str).map(mapping_dict)
-    else:
-        # Mapping single binary values to descriptions for other columns
-        df_qa2_descr[column] = df_qa2[column].map(lambda x: descriptions[column][int(x)])
-
-# Saving the modified DataFrame to the same Excel file in a new sheet named 'pixel_descr2'
-with pd.ExcelWriter(output_excel_path, engine='openpyxl', mode='a') as writer:
-    df_qa2_descr.to_excel(writer, sheet_name='pixel_descr2', index=False)
-
-from openpyxl.styles import Alignment
-
-# Function to auto-adjust column widths and set alignment
-def adjust_column_widths_and_align(worksheet):
-    for column_cells in worksheet.columns:
-        length_max = max(len(str(cell.value)) for cell in column_cells)
-        worksheet.column_dimensions[column_cells[0].column_letter].width = length_max + 2
-        
-        for cell in column_cells:
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-
-# Saving the DataFrames to the Excel file and adjusting column widths and alignment
-with pd.ExcelWriter(output_excel_path, engine='openpyxl') as writer:
-    # Saving QA1 DataFrame
-    df_qa1.to_excel(writer, sheet_name='pixel_stats', index=False)
-    
-    df_qa1_percentage.to_excel(writer, sheet_name='pixel_stats2', index=False)
-    
-    # Saving QA2 DataFrame
-    df_qa2.to_excel(writer, sheet_name='pixel_descr', index=False)
-    
-    # Saving the modified QA2 DataFrame
-    df_qa2_descr.to_excel(writer, sheet_name='pixel_descr2', index=False)
-    
-    # Getting the workbook object
-    workbook = writer.book
-    
-    # Adjusting column widths and alignment for each sheet
-    for sheetname in workbook.sheetnames:
-        worksheet = workbook[sheetname]
-        adjust_column_widths_and_align(worksheet)
-
-
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: QA.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script performs quality assurance analysis on raster data. It includes pixel value counting and data processing for quality assurance purposes. Each QA band is read once, in windows of rows, and all of its codes are counted with a single bincount; the files are processed in parallel and the columns are the union of the codes found in the files. The codes are decoded with the bitwise QA_PIXEL decoder of "QA_Masks.py". All tables are built in memory (optionally kept as Parquet files, from which the workbook can be rebuilt without scanning the QA bands again) and the formatted workbook is written once, in write-only mode.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, sys, rasterio, pandas, numpy, openpyxl, pyarrow (optional, for Parquet), concurrent.futures, QA_Masks
+# ----------------------------------------------------------------------------
+# Input: Processes raster data from the directory "C:\\Users\\PHYS3009\\Desktop\\QA\\Inputs".
+# ----------------------------------------------------------------------------
+# Output: Results are saved to "QA_Results.xlsx" at "C:\\Users\\PHYS3009\\Desktop\\QA\\Outputs".
+# ----------------------------------------------------------------------------
+
+import os
+import sys
+import rasterio
+from rasterio.windows import Window
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+# QA_Masks.py is in the Preprocessing_and_Processing folder
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Preprocessing_and_Processing"))
+import QA_Masks
+
+# Define directories and file paths for QA1
+input_directory = "C:\\Users\\PHYS3009\\Desktop\\QA\\Inputs"
+output_excel_path = "C:\\Users\\PHYS3009\\Desktop\\QA\\Outputs\\QA_Results.xlsx"
+
+# Folder of the Parquet copies of the tables (None keeps them in memory only)
+tables_dir = None
+
+# Rebuild the workbook from the Parquet tables in tables_dir instead of scanning the QA bands again (e.g. after a formatting change)
+from_tables = False
+
+# Number of rows read at once from each QA band (None reads the whole band)
+window_rows = 1024
+
+# Number of files processed at the same time (None uses all available cores)
+max_workers = None
+
+# Function to count the pixels of every QA code of one file for QA1 (a single read, in windows of rows)
+def qa_histogram(file_path, rows=window_rows):
+    counts = np.zeros(65536, dtype=np.int64)
+    with rasterio.open(file_path) as src:
+        step = rows or src.height
+        for row_off in range(0, src.height, step):
+            window = Window(0, row_off, src.width, min(step, src.height - row_off))
+            raster = src.read(1, window=window)
+            # QA_PIXEL codes are 16-bit, so one bincount over 65536 bins counts every code at once
+            counts += np.bincount(raster.ravel().astype(np.uint16), minlength=65536)
+
+    # Only the codes present in the file are kept
+    codes = np.flatnonzero(counts)
+    return dict(zip(codes.tolist(), counts[codes].tolist()))
+
+def find_qa_files(directory=input_directory):
+    return [os.path.join(directory, File_Name) for File_Name in os.listdir(directory) if File_Name.endswith(".TIF")]
+
+# Pixel counts of every QA code in every file; the columns are the union of the codes found in the files
+def pixel_stats(file_paths, rows=window_rows, workers=max_workers):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        histograms = list(executor.map(qa_histogram, file_paths, [rows] * len(file_paths)))
+
+    # Sorting pixel values for column ordering
+    all_pixel_values = sorted(set().union(*histograms))
+    columns = ['File_Name'] + all_pixel_values
+
+    # Codes missing from a file have a count of 0
+    data = [{'File_Name': os.path.basename(file_path), **{value: counts.get(value, 0) for value in all_pixel_values}}
+            for file_path, counts in zip(file_paths, histograms)]
+    return pd.DataFrame(data, columns=columns)
+
+# Functions for QA2.py
+def interpret_codes(codes):
+    # Decode all QA codes at once with the bitwise decoder; flags are written as "0"/"1" and confidences as "00" to "11"
+    codes = np.asarray(codes, dtype=np.uint16)
+    flags = {name: values.astype(int).astype(str) for name, values in QA_Masks.decode_flags(codes).items()}
+    confidences = {name: [format(value, '02b') for value in values] for name, values in QA_Masks.decode_confidences(codes).items()}
+    return {**flags, **confidences}
+
+def header_to_binary(header):
+    return format(int(header), '016b')
+
+# Definitions for the new descriptions
+descriptions = {
+    "Fill": ["Image data", "Fill data"],
+    "Dilated_Cloud": ["Cloud is not dilated or no cloud", "Cloud dilation"],
+    "Cirrus": ["Cirrus confidence: no confidence level set or low confidence", "High confidence cirrus"],
+    "Cloud": ["Cloud confidence is not high", "High confidence cloud"],
+    "Cloud_Shadow": ["Cloud shadow confidence is not high", "High confidence cloud shadow"],
+    "Snow": ["Snow/Ice confidence is not high", "High confidence snow cover"],
+    "Clear": ["Cloud or dilated cloud bits are set", "Cloud and dilated cloud bits are not set"],
+    "Water": ["Land or cloud", "Water"],
+    "Cloud_Confidence": ["No confidence level set", "Low confidence", "Medium confidence", "High confidence"],
+    "Cloud_Shadow_Confidence": ["No confidence level set", "Low confidence", "Reserved", "High confidence"],
+    "Snow_Ice_Confidence": ["No confidence level set", "Low confidence", "Reserved", "High confidence"],
+    "Cirrus_Confidence": ["No confidence level set", "Low confidence", "Reserved", "High confidence"]
+}
+
+# Tables of QA2.py: one row per QA code, with its bits and the decoded flags and confidences (headers come from the pixel_stats columns)
+def code_table(df_qa1):
+    headers = list(df_qa1.columns[1:])
+    return pd.DataFrame({"Original_Header": headers, "Binary_Format": [header_to_binary(header) for header in headers],
+                         **interpret_codes(headers)})
+
+def code_descriptions(df_qa2):
+    # Replace the bits of every flag ("0"/"1") and confidence ("00" to "11") by their descriptions
+    df_qa2_descr = df_qa2.copy()
+    for column, texts in descriptions.items():
+        width = 1 if len(texts) == 2 else 2
+        df_qa2_descr[column] = df_qa2[column].astype(str).map({format(i, f'0{width}b'): text for i, text in enumerate(texts)})
+    return df_qa2_descr
+
+def pixel_percentages(df_qa1):
+    # Remove 'File_Name' and the fill code (1), then calculate the percentage of each cell relative to the sum of its row
+    counts = df_qa1.drop(columns=['File_Name', 1], errors='ignore')
+    df_qa1_percentage = counts.div(counts.sum(axis=1), axis=0) * 100
+
+    # Reinsert the 'File_Name' column to the beginning of the DataFrame
+    df_qa1_percentage.insert(0, 'File_Name', df_qa1['File_Name'])
+    return df_qa1_percentage.round(1)
+
+def qa_tables(df_qa1):
+    # All sheets of the QA workbook, in their order
+    df_qa2 = code_table(df_qa1)
+    return {
+        'pixel_stats': df_qa1,
+        'pixel_stats2': pixel_percentages(df_qa1),
+        'pixel_descr': df_qa2,
+        'pixel_descr2': code_descriptions(df_qa2),
+    }
+
+def save_tables(tables, directory=tables_dir):
+    # Parquet copy of every table (Parquet column names are strings)
+    os.makedirs(directory, exist_ok=True)
+    for sheet_name, df in tables.items():
+        df.rename(columns=str).to_parquet(os.path.join(directory, f"{sheet_name}.parquet"), index=False)
+
+def load_tables(directory=tables_dir):
+    # Tables saved by save_tables, in the order of the sheets
+    tables = {}
+    for sheet_name in ['pixel_stats', 'pixel_stats2', 'pixel_descr', 'pixel_descr2']:
+        df = pd.read_parquet(os.path.join(directory, f"{sheet_name}.parquet"))
+        # QA codes are integer columns again
+        tables[sheet_name] = df.rename(columns=lambda column: int(column) if column.isdigit() else column)
+    return tables
+
+def column_widths(df):
+    # Width of every column from its longest value or header, computed on the data instead of cell by cell
+    return [max([len(str(column))] + df[column].map(lambda value: len(str(value)) if pd.notna(value) else 0).tolist()) + 2
+            for column in df.columns]
+
+def write_workbook(tables, output_path=output_excel_path):
+    # Write all sheets once, in write-only (streaming) mode, with the column widths and centre alignment
+    workbook = Workbook(write_only=True)
+    alignment = Alignment(horizontal='center', vertical='center')
+    header_font = Font(bold=True)
+    header_border = Border(*(Side(style='thin'),) * 4)
+
+    for sheet_name, df in tables.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        # Column widths have to be set before the first row is written
+        for index, width in enumerate(column_widths(df), start=1):
+            worksheet.column_dimensions[get_column_letter(index)].width = width
+
+        header = []
+        for column in df.columns:
+            cell = WriteOnlyCell(worksheet, value=column)
+            cell.font, cell.border, cell.alignment = header_font, header_border, alignment
+            header.append(cell)
+        worksheet.append(header)
+
+        # Missing values are written as empty cells
+        for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+            cells = []
+            for value in row:
+                cell = WriteOnlyCell(worksheet, value=value)
+                cell.alignment = alignment
+                cells.append(cell)
+            worksheet.append(cells)
+
+    # Write to a temporary file first so an interrupted export never leaves a broken workbook
+    tmp_path = output_path + ".tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, output_path)
+
+def main():
+    if from_tables:
+        # Tables of an earlier run, without reading the QA bands
+        tables = load_tables(tables_dir)
+    else:
+        # Main logic of QA1.py
+        df_qa1 = pixel_stats(find_qa_files(input_directory))
+
+        # Main logic of QA2.py and the derived sheets, all in memory
+        tables = qa_tables(df_qa1)
+        if tables_dir:
+            save_tables(tables, tables_dir)
+
+    # Saving all DataFrames to the Excel file at once
+    write_workbook(tables, output_excel_path)
+
+if __name__ == "__main__":
+    main()
@@ -1,169 +1,326 @@
-# -----------------------------Header information------------------------------
-# Author: Ali Reza Shahvaran
-# Filename: TIF_to_PNG.py
-# License: CC BY 4.0
-# ----------------------------------------------------------------------------
-# Description: This script converts TIF files to PNG format. It includes functionalities for reading raster data, processing it, and saving the output as PNG images.
-# ----------------------------------------------------------------------------
-# Programming Language: Python 3.0
-# Libraries: os, matplotlib, rasterio, geopandas, numpy, PIL, glob
-# ----------------------------------------------------------------------------
-# Input: Reads TIF files from a specified directory.
-# ----------------------------------------------------------------------------
-# Output: Saves converted PNG images to a specified location.
-# ----------------------------------------------------------------------------
-
-import os
-import matplotlib
-import rasterio
-import matplotlib.pyplot as plt
-import geopandas as gpd
-import numpy as np
-import rasterio.plot
-import matplotlib.font_manager as font_manager
-from PIL import Image
-import matplotlib.animation as animation
-import glob
-
-
-# Define the directories
-input_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Test"
-#input_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_Annual"
-output_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_PNG"
-shapefile_path = "C:\\Users\\PHYS3009\\Desktop\\TIF_to_PNG\\TIF_to_PNG_Shapefile\\wlo_boundaries_shp.shp"
-
-# Load and transform the shapefile to match raster's coordinate system (WKID 32617)
-shapefile = gpd.read_file(shapefile_path)
-shapefile = shapefile.to_crs(epsg=32617)
-
-# Function to process each TIFF file
-def process_tiff(file_path, output_path, date_str, data_str2):
-    dpi = 300
-    fig_width = 3440 / dpi 
-    fig_height = 3090 / dpi
-
-    with rasterio.open(file_path) as src:
-        # Create a figure and axis with the specified size
-        fig, ax = plt.subplots(figsize=(fig_width, fig_height))
-
-        # Show the raster data with Viridis colormap
-        rasterio.plot.show(src, ax=ax, cmap='viridis', vmin=0, vmax=30)
-
-        # Set the extent to match the shapefile's bounding box
-        minx, miny, maxx, maxy = shapefile.total_bounds
-        ax.set_xlim(minx, maxx)
-        ax.set_ylim(miny, maxy)
-
-        # Overlay the shapefile
-        shapefile.plot(ax=ax, edgecolor='black', facecolor='none')
-
-        # Add color bar
-        cbar = plt.colorbar(ax.images[0], ax=ax, orientation='horizontal', fraction=0.046, pad=0.04)
-        cbar.set_label('Estimated Chl-a (µg/L)', fontname='PrimaSerif BT', fontsize=18)
-        cbar.set_ticks(np.arange(0, 31, 5))
-        # Set font for color bar tick labels
-        for label in cbar.ax.get_xticklabels():
-            label.set_fontname('PrimaSerif BT')
-            label.set_fontsize(18)
-
-        # Add titles
-        title_font = font_manager.FontProperties(family='Prima Serif', style='normal', size=12)
-        ax.set_title(f"Acquisition Date: {date_str}\nSensor: {data_str2}\nLocation: Western Lake Ontario & Hamilton Harbour", fontproperties=title_font, fontsize=18, pad=20, loc='left')
-
-        # Load logos
-        logo1 = Image.open("C:\\Users\\PHYS3009\\Desktop\\TIF_to_PNG\\TIF_to_PNG_Logos\\WATERLO1-22766-PP-removebg-preview.png")
-        logo2 = Image.open("C:\\Users\\PHYS3009\\Desktop\\TIF_to_PNG\\TIF_to_PNG_Logos\\40ed84_4df788ae4ebc4ef9840c71acc6f79996~mv2.png")
-
-        # Resize logos (adjust sizes as needed)
-        logo1 = logo1.resize(((66*8), (37*8))) 
-        logo2 = logo2.resize((250, 230))
-
-        # Place logos on the plot
-        fig.figimage(logo1, 50-70, fig.bbox.ymax + 850+75)
-        fig.figimage(logo2, 600-80, fig.bbox.ymax + 865+75) 
-
-        # Remove axis labels and frame
-        ax.set_xlabel('')
-        ax.set_ylabel('')
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_visible(False)
-        ax.spines['bottom'].set_visible(False)
-
-        # Save the figure
-        plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
-        plt.close(fig)
-
-# Iterate over the directories and files
-for root, dirs, files in os.walk(input_dir):
-    for file in files:
-        if file.endswith('.tif'):
-            year = os.path.basename(root)
-            file_path = os.path.join(root, file)
-            output_path = os.path.join(output_dir, year, file.replace('.tif', '.png'))
-
-            # Ensure the output directory exists
-            if not os.path.exists(os.path.dirname(output_path)):
-                os.makedirs(os.path.dirname(output_path))
-
-            # Correctly extract date from file name
-            parts = file.split('_')
-            date_str = f"{parts[2]}-{parts[3]}-{parts[4]}"
-
-
-            # Iterate over the directories and files
-for root, dirs, files in os.walk(input_dir):
-    for file in files:
-        if file.endswith('.tif'):
-            year = os.path.basename(root)
-            file_path = os.path.join(root, file)
-            output_path = os.path.join(output_dir, year, file.replace('.tif', '.png'))
-            # Correctly extract date from file name
-            parts = file.split('_')
-            date_str = f"{parts[2]}-{parts[3]}-{parts[4]}"
-
-            # Define data_str2 based on the sensor type
-            if parts[0] == 'L8':
-                data_str2 = 'OLI (Landsat 8)'
-            elif parts[0] == 'L9':
-                data_str2 = 'OLI-2 (Landsat 9)'
-            else:
-                data_str2 = 'Unknown Sensor'
-
-            # Process the TIFF file
-            process_tiff(file_path, output_path, date_str, data_str2)
-
-print("Image processing complete.")
-
-# Function to sort files by acquisition date (extracted from file name)
-# Define dpi globally if used outside process_tiff
-dpi = 300
-
-# Function to sort files by acquisition date (extracted from file name)
-def sort_key(filename):
-    parts = os.path.basename(filename).split('_')
-    return f"{parts[2]}-{parts[3]}-{parts[4]}"
-
-# Collect all PNG files from the output directory, sorted by date
-png_files = sorted(glob.glob(os.path.join(output_dir, '**', '*.png'), recursive=True), key=sort_key)
-
-# Create a figure for the animation
-fig = plt.figure(figsize=(3440 / dpi , 3090 / dpi ))
-
-# Function to update the frame of the animation
-def update_frame(i):
-    plt.clf()
-    plt.imshow(Image.open(png_files[i]))
-    plt.axis('off')  # Hide axis
-
-# Create animation
-ani = animation.FuncAnimation(fig, update_frame, frames=len(png_files), interval=500)  # 500ms per frame
-
-# Save the animation
-animation_output_path = os.path.join("E:\\Thesis\Chapter_3\RS_Data\Chla_Outputs_PNG", "animation.mp4")
-ani.save(animation_output_path, writer='ffmpeg', dpi=dpi)
-
-print("Animation complete and saved to:", animation_output_path)
-                                     
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: TIF_to_PNG.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script converts TIF files to PNG format. It includes functionalities for reading raster data, processing it, and saving the output as PNG images. The maps are rendered in parallel with the Agg backend; every worker builds the static layers (figure, boundary overlay, colorbar, logos and title) once and only swaps the raster data and the title text for each scene. The animation streams raw RGB frames, decoded from the PNGs or rendered directly, in date order into an ffmpeg process (or an image sequence when ffmpeg is not available), without re-drawing them with matplotlib. Each raster is read only inside the map limits and at the resolution of the saved figure (decimated reads, which use the overviews when the rasters have them).
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, matplotlib, rasterio, geopandas, numpy, PIL, glob, io, shutil, subprocess, collections, concurrent.futures
+# ----------------------------------------------------------------------------
+# Input: Reads TIF files from a specified directory.
+# ----------------------------------------------------------------------------
+# Output: Saves converted PNG images to a specified location.
+# ----------------------------------------------------------------------------
+
+import os
+import matplotlib
+# Non-interactive backend, so the maps can be rendered in worker processes
+matplotlib.use('Agg')
+import rasterio
+import matplotlib.pyplot as plt
+import geopandas as gpd
+import numpy as np
+from rasterio.enums import Resampling
+from rasterio.windows import Window, from_bounds, bounds as window_bounds
+from rasterio.errors import WindowError
+import matplotlib.font_manager as font_manager
+from PIL import Image
+import glob
+import io
+import math
+import shutil
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Define the directories
+input_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Test"
+#input_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_Annual"
+output_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_PNG"
+shapefile_path = "C:\\Users\\PHYS3009\\Desktop\\TIF_to_PNG\\TIF_to_PNG_Shapefile\\wlo_boundaries_shp.shp"
+logo_paths = ["C:\\Users\\PHYS3009\\Desktop\\TIF_to_PNG\\TIF_to_PNG_Logos\\WATERLO1-22766-PP-removebg-preview.png",
+              "C:\\Users\\PHYS3009\\Desktop\\TIF_to_PNG\\TIF_to_PNG_Logos\\40ed84_4df788ae4ebc4ef9840c71acc6f79996~mv2.png"]
+
+# Figure size (3440 x 3090 px at 300 dpi)
+dpi = 300
+fig_width = 3440 / dpi
+fig_height = 3090 / dpi
+
+# Source pixels read per map pixel along each axis (1 matches the resolution of the saved figure; higher keeps more detail)
+oversample = 1.0
+
+# Title of every map and sensor names by prefix of the file name
+title_template = "Acquisition Date: {date_str}\nSensor: {data_str2}\nLocation: Western Lake Ontario & Hamilton Harbour"
+sensor_names = {'L8': 'OLI (Landsat 8)', 'L9': 'OLI-2 (Landsat 9)'}
+
+# Number of maps rendered at the same time (None uses all available cores)
+max_workers = None
+
+# Animation: frames from the saved PNGs ("png") or rendered directly ("render"), encoded with ffmpeg ("ffmpeg")
+# or written as an image sequence ("images"); 2 frames per second (500 ms per frame)
+animation_path = os.path.join(output_dir, "animation.mp4")
+animation_source = "png"
+animation_encoder = "ffmpeg"
+animation_fps = 2
+ffmpeg_command = "ffmpeg"
+
+# Number of rendered frames held in memory while they wait to be encoded
+frames_ahead = 4
+
+# Static layers of the map, built once per worker process by init_renderer
+renderer = {}
+
+def load_shapefile(path=shapefile_path):
+    # Load and transform the shapefile to match raster's coordinate system (WKID 32617)
+    shapefile = gpd.read_file(path)
+    return shapefile.to_crs(epsg=32617)
+
+def init_renderer(path=shapefile_path, logos=logo_paths):
+    # Create a figure and axis with the specified size
+    fig, ax = plt.subplots(figsize=(fig_width, fig_height))
+
+    # Placeholder image with the Viridis colormap; the raster data and extent are set for every scene
+    image = ax.imshow(np.full((1, 1), np.nan, dtype=np.float32), cmap='viridis', vmin=0, vmax=30)
+
+    # Set the extent to match the shapefile's bounding box
+    shapefile = load_shapefile(path)
+    minx, miny, maxx, maxy = shapefile.total_bounds
+    ax.set_xlim(minx, maxx)
+    ax.set_ylim(miny, maxy)
+
+    # Overlay the shapefile
+    shapefile.plot(ax=ax, edgecolor='black', facecolor='none')
+
+    # Add color bar
+    cbar = plt.colorbar(image, ax=ax, orientation='horizontal', fraction=0.046, pad=0.04)
+    cbar.set_label('Estimated Chl-a (µg/L)', fontname='PrimaSerif BT', fontsize=18)
+    cbar.set_ticks(np.arange(0, 31, 5))
+    # Set font for color bar tick labels
+    for label in cbar.ax.get_xticklabels():
+        label.set_fontname('PrimaSerif BT')
+        label.set_fontsize(18)
+
+    # Add titles
+    title_font = font_manager.FontProperties(family='Prima Serif', style='normal', size=12)
+    title = ax.set_title("", fontproperties=title_font, fontsize=18, pad=20, loc='left')
+
+    # Load logos and resize them (adjust sizes as needed)
+    logo1 = Image.open(logos[0]).resize(((66*8), (37*8)))
+    logo2 = Image.open(logos[1]).resize((250, 230))
+
+    # Place logos on the plot
+    fig.figimage(logo1, 50-70, fig.bbox.ymax + 850+75)
+    fig.figimage(logo2, 600-80, fig.bbox.ymax + 865+75)
+
+    # Remove axis labels and frame
+    ax.set_xlabel('')
+    ax.set_ylabel('')
+    ax.set_xticks([])
+    ax.set_yticks([])
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    # Size of the map area in pixels of the saved figure (after the colorbar and the equal aspect are applied)
+    ax.apply_aspect()
+    position = ax.get_position()
+    pixels = (position.width * fig_width * dpi, position.height * fig_height * dpi)
+
+    renderer.update(fig=fig, ax=ax, image=image, title=title, limits=((minx, maxx), (miny, maxy)), pixels=pixels)
+
+# Read only the part of the raster inside the map limits, decimated to the map resolution
+def read_map(src, limits, pixels, factor=oversample):
+    (minx, maxx), (miny, maxy) = limits
+    roi_window = from_bounds(minx, miny, maxx, maxy, src.transform)
+
+    # Source pixels per map pixel, from the axis that needs the most detail (never upsampled)
+    step = max(1.0, min(roi_window.width / pixels[0], roi_window.height / pixels[1]) / factor)
+
+    # Whole pixels covering the limits, clipped to the raster
+    col_off, row_off = math.floor(roi_window.col_off), math.floor(roi_window.row_off)
+    window = Window(col_off, row_off, math.ceil(roi_window.col_off + roi_window.width) - col_off,
+                    math.ceil(roi_window.row_off + roi_window.height) - row_off)
+    try:
+        window = window.intersection(Window(0, 0, src.width, src.height))
+    except WindowError:
+        # The raster does not overlap the map
+        return np.ma.masked_all((1, 1), dtype=np.float32), (minx, maxx, miny, maxy)
+
+    # Decimated read; GDAL uses the matching overview level when the raster has overviews
+    out_shape = (max(1, math.ceil(window.height / step)), max(1, math.ceil(window.width / step)))
+    data = src.read(1, window=window, out_shape=out_shape, masked=True, resampling=Resampling.nearest)
+    left, bottom, right, top = window_bounds(window, src.transform)
+    return data, (left, right, bottom, top)
+
+# Function to process each TIFF file
+def process_tiff(file_path, output_path, date_str, data_str2, pil_kwargs=None):
+    if not renderer:
+        init_renderer()
+
+    with rasterio.open(file_path) as src:
+        data, extent = read_map(src, renderer["limits"], renderer["pixels"])
+
+    # Swap the raster data and the title; setting the extent keeps the shapefile's bounding box as the view
+    image, ax = renderer["image"], renderer["ax"]
+    image.set_data(data)
+    image.set_extent(extent)
+    ax.set_xlim(*renderer["limits"][0])
+    ax.set_ylim(*renderer["limits"][1])
+    renderer["title"].set_text(title_template.format(date_str=date_str, data_str2=data_str2))
+
+    # Save the figure
+    renderer["fig"].savefig(output_path, dpi=dpi, bbox_inches='tight', format='png', pil_kwargs=pil_kwargs)
+    return output_path
+
+def render_scene(job):
+    try:
+        return process_tiff(*job)
+    except Exception as e:
+        print(f"Error processing {job[0]}: {e}")
+        return None
+
+# Scenes to render: (TIF file, PNG file, acquisition date, sensor), from a single walk over the input directory
+def find_tiffs(directory=input_dir, base_dir=output_dir):
+    jobs = []
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.endswith('.tif'):
+                year = os.path.basename(root)
+                file_path = os.path.join(root, file)
+                output_path = os.path.join(base_dir, year, file.replace('.tif', '.png'))
+
+                # Correctly extract date from file name
+                parts = file.split('_')
+                date_str = f"{parts[2]}-{parts[3]}-{parts[4]}"
+
+                # Define data_str2 based on the sensor type
+                data_str2 = sensor_names.get(parts[0], 'Unknown Sensor')
+                jobs.append((file_path, output_path, date_str, data_str2))
+    return jobs
+
+def render_maps(jobs, workers=max_workers):
+    # Ensure the output directories exist
+    for output_folder in {os.path.dirname(job[1]) for job in jobs}:
+        os.makedirs(output_folder, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_renderer) as executor:
+        return [output_path for output_path in executor.map(render_scene, jobs) if output_path]
+
+# Function to sort files by acquisition date (extracted from file name)
+def sort_key(filename):
+    parts = os.path.basename(filename).split('_')
+    return f"{parts[2]}-{parts[3]}-{parts[4]}"
+
+# Decoded PNG frames, one at a time, as RGB arrays
+def png_frames(png_files):
+    for png_file in png_files:
+        with Image.open(png_file) as image:
+            yield np.asarray(image.convert('RGB'))
+
+def render_frame(job):
+    # Render one map into memory (uncompressed PNG, never written to disk) and return it as an RGB array;
+    # a scene that fails is reported and skipped (None), like in render_scene
+    file_path, output_path, date_str, data_str2 = job
+    try:
+        if not renderer:
+            init_renderer()
+        buffer = io.BytesIO()
+        process_tiff(file_path, buffer, date_str, data_str2, pil_kwargs={'compress_level': 0})
+        buffer.seek(0)
+        with Image.open(buffer) as image:
+            return np.asarray(image.convert('RGB'))
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        return None
+
+# Frames rendered directly by the worker pool, in the order of the jobs; only frames_ahead frames are held in memory,
+# and the scenes that failed to render are left out of the animation
+def rendered_frames(jobs, workers=max_workers, ahead=frames_ahead):
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_renderer) as executor:
+        pending = deque()
+        for job in jobs:
+            pending.append(executor.submit(render_frame, job))
+            if len(pending) >= ahead:
+                frame = pending.popleft().result()
+                if frame is not None:
+                    yield frame
+        while pending:
+            frame = pending.popleft().result()
+            if frame is not None:
+                yield frame
+
+def fit_frame(frame, size):
+    # All frames of a video have the size of the first one
+    if (frame.shape[1], frame.shape[0]) == size:
+        return frame
+    return np.asarray(Image.fromarray(frame).resize(size))
+
+def encode_ffmpeg(frames, output_path, fps=animation_fps, command=ffmpeg_command):
+    # Stream the raw RGB frames into ffmpeg through a pipe; the size is taken from the first frame
+    process = None
+    count = 0
+    try:
+        for frame in frames:
+            if process is None:
+                size = (frame.shape[1], frame.shape[0])
+                process = subprocess.Popen([command, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                                            '-s', f"{size[0]}x{size[1]}", '-r', str(fps), '-i', '-',
+                                            # H.264 with yuv420p needs even dimensions
+                                            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+                                            output_path], stdin=subprocess.PIPE)
+            process.stdin.write(np.ascontiguousarray(fit_frame(frame, size)).tobytes())
+            count += 1
+    except BrokenPipeError:
+        pass
+    finally:
+        if process is not None:
+            process.stdin.close()
+            process.wait()
+    if process is not None and process.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with code {process.returncode}")
+    return count
+
+def write_image_sequence(frames, output_path, fps=animation_fps):
+    # Stand-in for the video: the numbered frames in a folder named after the video (encode later at fps frames per second)
+    frame_dir = os.path.splitext(output_path)[0] + "_frames"
+    os.makedirs(frame_dir, exist_ok=True)
+    count = 0
+    for frame in frames:
+        if count == 0:
+            size = (frame.shape[1], frame.shape[0])
+        Image.fromarray(fit_frame(frame, size)).save(os.path.join(frame_dir, f"frame_{count:05d}.png"))
+        count += 1
+    print(f"{count} frame(s) written to {frame_dir} ({fps} frames per second)")
+    return frame_dir
+
+def make_animation(frames, output_path=animation_path, encoder=animation_encoder, fps=animation_fps):
+    # ffmpeg when it is available, otherwise the image sequence; returns the video or the frame folder actually written
+    if encoder == "ffmpeg" and shutil.which(ffmpeg_command) is None:
+        print(f"{ffmpeg_command} not found, writing the frames as an image sequence instead")
+        encoder = "images"
+    if encoder != "ffmpeg":
+        return write_image_sequence(frames, output_path, fps)
+    count = encode_ffmpeg(frames, output_path, fps, ffmpeg_command)
+    print(f"{count} frame(s) encoded")
+    return output_path
+
+def main():
+    jobs = find_tiffs(input_dir, output_dir)
+
+    if animation_source == "render":
+        # Frames straight from the renderer, in date order
+        frames = rendered_frames(sorted(jobs, key=lambda job: sort_key(job[0])))
+    else:
+        render_maps(jobs)
+        print("Image processing complete.")
+
+        # Collect all map PNG files from the output directory (not the frames of an image sequence), sorted by date
+        png_files = sorted(glob.glob(os.path.join(output_dir, '**', 'L[89]_*.png'), recursive=True), key=sort_key)
+        frames = png_frames(png_files)
+
+    animation_output_path = make_animation(frames, animation_path)
+    print("Animation complete and saved to:", animation_output_path)
+
+if __name__ == "__main__":
+    main()
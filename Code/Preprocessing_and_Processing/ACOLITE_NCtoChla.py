@@ -0,0 +1,120 @@
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: ACOLITE_NCtoChla.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script computes the Chl-a maps directly from the ACOLITE L2W .nc (NetCDF) files, without writing the per-band TIF files first. Only the rhow variables needed by the formula are read, block by block, and the result is written with the same formula, skip list, L8/L9 band names, output layout and statistics sidecar as "Band_Math.py".
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, xarray, rasterio, numpy, concurrent.futures, logging, Band_Math, ACOLITE_NCtoTIF, Raster_Sidecars
+# ----------------------------------------------------------------------------
+# Input: Reads L2W .nc files from a specified root folder.
+# ----------------------------------------------------------------------------
+# Output: Saves the Chl-a TIF files in the "Band_Math.py" output folders (one subfolder per year), optionally keeping the per-band TIF files (recorded in the manifest of "ACOLITE_NCtoTIF.py").
+# ----------------------------------------------------------------------------
+
+import os
+import xarray as xr
+import rasterio
+from rasterio.crs import CRS
+from rasterio.transform import Affine
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import logging
+
+import Band_Math
+import ACOLITE_NCtoTIF
+import Raster_Sidecars
+
+# Also write the per-band TIF files used by the formula (through "ACOLITE_NCtoTIF.py", so they are recorded in its manifest)
+keep_intermediates = False
+
+def required_bands(names=None):
+    # Bands needed by the selected algorithms, or the blue and red bands of the Chl-a formula
+    if not names:
+        return ["rhow_483", "rhow_655"]
+    bands = []
+    for name in names:
+        bands.extend(band for band in Band_Math.algorithms[name]["bands"] if band not in bands)
+    return bands
+
+def process_nc_file(nc_file_path, names=None, budget_mb=Band_Math.memory_budget_mb):
+    # The L2W folder name is the .nc file name without its extension
+    root, file = os.path.split(nc_file_path)
+    folder_name = os.path.splitext(file)[0]
+    folder_path = os.path.join(root, folder_name)
+
+    # Skip processing if the folder is in the skip list or was rejected by the pre-filter
+    if Band_Math.skip_scene(folder_name):
+        logging.info(f"Skipping folder {folder_name}")
+        return None
+
+    bands = required_bands(names)
+    with xr.open_dataset(nc_file_path, cache=False) as ds:
+        arrays = {band: ds[Band_Math.band_name(folder_name, band)] for band in bands}
+        height, width = arrays[bands[0]].shape
+
+        # Same grid, block layout and georeferencing as the TIF files written by ACOLITE_NCtoTIF.py
+        profile = {
+            "driver": "GTiff", "width": width, "height": height, "count": len(names) if names else 1,
+            "dtype": rasterio.float32, "nodata": np.nan,
+            "crs": CRS.from_wkt(ds.transverse_mercator.crs_wkt),
+            "transform": Affine.from_gdal(*ACOLITE_NCtoTIF.geotransform),
+            "tiled": True, "blockxsize": ACOLITE_NCtoTIF.block_size, "blockysize": ACOLITE_NCtoTIF.block_size,
+        }
+
+        if names:
+            output_file = Band_Math.output_file_path(folder_path, Band_Math.algorithms_output_base_dir)
+            bytes_per_pixel = 4 * (len(bands) + len(names) + 2)
+        else:
+            output_file = Band_Math.output_file_path(folder_path)
+            bytes_per_pixel = 20
+
+        output_bands = names or ["chl_a"]
+        sidecar = Raster_Sidecars.init_sidecar(output_file, profile["crs"], profile["transform"], (height, width), output_bands)
+        with rasterio.open(output_file, 'w', **profile) as dst:
+            if names:
+                for index, name in enumerate(names, start=1):
+                    dst.set_band_description(index, name)
+
+            # Read only the hyperslab of each band that falls in the current window
+            for window in Band_Math.block_row_windows(dst, budget_mb, bytes_per_pixel):
+                rows = slice(window.row_off, window.row_off + window.height)
+                data = {band: np.asarray(array[rows, :].values, dtype=np.float32) for band, array in arrays.items()}
+                if names:
+                    results = Band_Math.calculate_algorithms(names, data)
+                else:
+                    results = Band_Math.calculate_chla(data["rhow_483"], data["rhow_655"])[None]
+                dst.write(results, window=window)
+                for band, result in zip(output_bands, results):
+                    Raster_Sidecars.update_sidecar(sidecar, band, result, window.row_off, window.col_off)
+        Raster_Sidecars.write_sidecar(sidecar)
+
+    logging.info(f"Processed {nc_file_path} successfully.")
+    return output_file
+
+def main(names=Band_Math.selected_algorithms):
+    base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\ACOLITE_Outputs"
+
+    # Find all L2W .nc files
+    nc_files = [nc_file_path for nc_file_path in ACOLITE_NCtoTIF.find_nc_files(base_dir)
+                if os.path.splitext(nc_file_path)[0].endswith('L2W')]
+
+    # Process each file in parallel
+    processed = []
+    with ProcessPoolExecutor(max_workers=Band_Math.max_workers) as executor:
+        futures = {executor.submit(process_nc_file, nc_file_path, names): nc_file_path for nc_file_path in nc_files}
+        for future in as_completed(futures):
+            try:
+                if future.result():
+                    processed.append(futures[future])
+            except Exception as e:
+                logging.error(f"Error processing {futures[future]}: {e}")
+
+    # Per-band TIF files of the processed scenes; the manifest is only written from this process
+    if keep_intermediates and processed:
+        ACOLITE_NCtoTIF.extract_and_save_rasters(base_dir, workers=Band_Math.max_workers,
+                                                 variables=required_bands(names), nc_files=sorted(processed))
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,228 @@
-# -----------------------------Header information------------------------------
-# Author: Ali Reza Shahvaran
-# Filename: ACOLITE_NCtoTIF.py
-# License: CC BY 4.0
-# ----------------------------------------------------------------------------
-# Description: This script converts .nc (NetCDF) files to TIF format. It traverses a directory structure, identifies .nc files, and performs the conversion using the GDAL library.
-# ----------------------------------------------------------------------------
-# Programming Language: Python 3.0
-# Libraries: os, xarray, osgeo (gdal, osr)
-# ----------------------------------------------------------------------------
-# Input: Reads .nc files from a specified root folder.
-# ----------------------------------------------------------------------------
-# Output: Saves the converted TIF files in a new folder.
-# ----------------------------------------------------------------------------
-
-import os
-import xarray as xr
-from osgeo import gdal, osr
-
-def extract_and_save_rasters(root_folder):
-    # Traverse through the nested folder structure
-    for root, dirs, files in os.walk(root_folder):
-        for file in files:
-            # Check if the file is a .nc file
-            if file.endswith(".nc"):
-                nc_file_path = os.path.join(root, file)
-                # Create a new folder named after the .nc file
-                output_folder = os.path.join(root, os.path.splitext(file)[0])
-                os.makedirs(output_folder, exist_ok=True)
-                
-                # Open the .nc file with xarray
-                ds = xr.open_dataset(nc_file_path)
-                crs_wkt = ds.transverse_mercator.crs_wkt
-                
-                for var_name in ds.data_vars:
-                    # Get the variable (data array)
-                    data_array = ds[var_name]
-                    # Check the number of dimensions in data_array
-                    if len(data_array.shape) >= 2:
-                        # Define the .tif file name
-                        tif_path = os.path.join(output_folder, f"{var_name}.tif")
-                        
-                        # Create a GDAL dataset and save the data array to a .tif file
-                        driver = gdal.GetDriverByName('GTiff')
-                        out_ds = driver.Create(tif_path, data_array.shape[1], data_array.shape[0], 1, gdal.GDT_Float32)
-                        out_band = out_ds.GetRasterBand(1)
-                        out_band.WriteArray(data_array.values)
-                        
-                        # Set the CRS from the extracted WKT string
-                        srs = osr.SpatialReference()
-                        srs.ImportFromWkt(crs_wkt)
-                        out_ds.SetProjection(srs.ExportToWkt())
-                        
-                        # Set the geotransform here (you might need to adjust this part based on the actual geotransform values)
-                        out_ds.SetGeoTransform([586260, 30, 0, 4870470, 0, -30])
-                        
-                        out_ds = None  # Close the dataset to write to disk
-                    else:
-                        print(f"Skipping variable {var_name} as it has less than 2 dimensions.")
-
-# Call the function, specifying the root folder
-extract_and_save_rasters("E:\\Thesis\\Chapter_3\\RS_Data\\ACOLITE_Outputs")
-
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: ACOLITE_NCtoTIF.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script converts .nc (NetCDF) files to TIF format. It traverses a directory structure, identifies .nc files, and performs the conversion using the GDAL library. A statistics sidecar (see "Raster_Sidecars.py") is written next to every TIF file. Scenes are converted in parallel and each variable is streamed to disk block by block, so the memory used per worker does not grow with the scene size. A manifest records every converted .nc file (size, modification time and content hash) with its outputs, so re-runs only convert new or changed scenes. Only the variables listed in selected_variables are read and written, with the L8/L9 band names treated as aliases of each other.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, json, hashlib, fnmatch, xarray, osgeo (gdal, osr), rasterio, concurrent.futures, Raster_Sidecars, Scene_Catalog
+# ----------------------------------------------------------------------------
+# Input: Reads .nc files from a specified root folder.
+# ----------------------------------------------------------------------------
+# Output: Saves the converted TIF files in a new folder and updates the manifest (nc_manifest.json) in the root folder.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+import hashlib
+import fnmatch
+import xarray as xr
+from osgeo import gdal, osr
+from rasterio.crs import CRS
+from rasterio.transform import Affine
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import Raster_Sidecars
+import Scene_Catalog
+
+# Size (in pixels) of the square blocks that are read from the .nc file and written to the tiled .tif files
+block_size = 512
+
+# Number of scenes converted at the same time (None uses all available cores)
+max_workers = None
+
+# Geotransform of the ACOLITE outputs (you might need to adjust this part based on the actual geotransform values)
+geotransform = [586260, 30, 0, 4870470, 0, -30]
+
+# Name of the manifest file kept in the root folder
+manifest_name = "nc_manifest.json"
+
+# Variables written for every scene (wildcards such as "rhow_*" are allowed, None writes every 2-D variable)
+# Band_Math.py uses the blue and red rhow bands, ACOLITE_Pixel_Extraction_rhow.py uses the five rhow bands
+# and Covered_Water_Surface.py uses chl_oc3
+selected_variables = ["rhow_443", "rhow_483", "rhow_561", "rhow_655", "rhow_865", "chl_oc3"]
+
+# Band names that differ between L8 (OLI) and L9 (OLI-2); selecting any name of a group selects the band of the scene
+band_aliases = [
+    ["rhow_483", "rhow_482"],
+    ["rhow_655", "rhow_654"],
+]
+
+def find_nc_files(root_folder):
+    # Every ACOLITE .nc file below the root folder, from the scene catalog
+    return Scene_Catalog.find_scenes(root_folder, kind="nc")
+
+def file_hash(file_path, chunk_size=1024 * 1024):
+    # Hash the file content in chunks so large .nc files are never loaded whole
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def load_manifest(root_folder):
+    manifest_path = os.path.join(root_folder, manifest_name)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r') as file:
+            return json.load(file)
+    except ValueError:
+        print(f"Ignoring unreadable manifest {manifest_path}")
+        return {}
+
+def save_manifest(root_folder, manifest):
+    # Write to a temporary file first so an interrupted run never leaves a truncated manifest
+    manifest_path = os.path.join(root_folder, manifest_name)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def outputs_exist(entry, root_folder):
+    return all(os.path.exists(os.path.join(root_folder, output)) for output in entry.get("outputs", []))
+
+def is_up_to_date(entry, nc_file_path, root_folder, variables=selected_variables):
+    # A scene is up to date when its size, modification time and variable selection are unchanged and all outputs are on disk
+    if not entry:
+        return False
+    stat = os.stat(nc_file_path)
+    return (entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns
+            and entry.get("variables") == variables and outputs_exist(entry, root_folder))
+
+def resolve_variables(ds, variables=selected_variables):
+    # Map the requested names (and their L8/L9 aliases or wildcards) to the variables present in the dataset
+    available = [var_name for var_name in ds.data_vars if len(ds[var_name].shape) >= 2]
+    if variables is None:
+        return available
+
+    var_names = []
+    for name in variables:
+        candidates = next((group for group in band_aliases if name in group), [name])
+        matches = [var_name for var_name in available if any(fnmatch.fnmatch(var_name, candidate) for candidate in candidates)]
+        if not matches:
+            print(f"Variable {name} not found in the dataset.")
+        var_names.extend(var_name for var_name in matches if var_name not in var_names)
+    return var_names
+
+def block_windows(height, width, size):
+    # Split a height x width grid into size x size windows (row offset, column offset, rows, columns)
+    for row_off in range(0, height, size):
+        for col_off in range(0, width, size):
+            yield row_off, col_off, min(size, height - row_off), min(size, width - col_off)
+
+def save_variable(data_array, tif_path, crs_wkt, size=block_size):
+    height, width = data_array.shape[0], data_array.shape[1]
+
+    # Create a tiled GDAL dataset so that every block is written to its own tile
+    # The data is written to a temporary file that only replaces tif_path once it is complete
+    tmp_path = tif_path + ".tmp"
+    driver = gdal.GetDriverByName('GTiff')
+    options = ["TILED=YES", f"BLOCKXSIZE={size}", f"BLOCKYSIZE={size}"]
+    out_ds = driver.Create(tmp_path, width, height, 1, gdal.GDT_Float32, options=options)
+    out_band = out_ds.GetRasterBand(1)
+
+    # Statistics sidecar of the variable, updated with every block as it is written
+    sidecar = Raster_Sidecars.init_sidecar(tif_path, CRS.from_wkt(crs_wkt), Affine.from_gdal(*geotransform),
+                                           (height, width), [data_array.name])
+
+    # Stream the variable block by block; only the sliced hyperslab is read from the .nc file
+    for row_off, col_off, rows, cols in block_windows(height, width, size):
+        block = data_array[row_off:row_off + rows, col_off:col_off + cols].values
+        out_band.WriteArray(block, col_off, row_off)
+        Raster_Sidecars.update_sidecar(sidecar, data_array.name, block, row_off, col_off)
+
+    # Set the CRS from the extracted WKT string
+    srs = osr.SpatialReference()
+    srs.ImportFromWkt(crs_wkt)
+    out_ds.SetProjection(srs.ExportToWkt())
+    out_ds.SetGeoTransform(geotransform)
+
+    out_band = None
+    out_ds = None  # Close the dataset to write to disk
+    os.replace(tmp_path, tif_path)
+    Raster_Sidecars.write_sidecar(sidecar)
+
+def convert_nc_file(nc_file_path, size=block_size, variables=selected_variables):
+    # Create a new folder named after the .nc file
+    root, file = os.path.split(nc_file_path)
+    output_folder = os.path.join(root, os.path.splitext(file)[0])
+    os.makedirs(output_folder, exist_ok=True)
+
+    # Remove temporary files left behind by an interrupted run
+    for leftover in os.listdir(output_folder):
+        if leftover.endswith(".tmp"):
+            os.remove(os.path.join(output_folder, leftover))
+
+    # Open the .nc file lazily (cache=False keeps xarray from holding whole variables in memory)
+    outputs = []
+    with xr.open_dataset(nc_file_path, cache=False) as ds:
+        crs_wkt = ds.transverse_mercator.crs_wkt
+
+        # Only the selected variables are read; everything else in the file is never touched
+        for var_name in resolve_variables(ds, variables):
+            # Define the .tif file name
+            tif_path = os.path.join(output_folder, f"{var_name}.tif")
+            save_variable(ds[var_name], tif_path, crs_wkt, size)
+            outputs.append(tif_path)
+
+    return outputs
+
+def update_scene(nc_file_path, root_folder, entry, size=block_size, variables=selected_variables):
+    # Hash the source; a touched but unchanged file only needs its manifest entry refreshed
+    stat = os.stat(nc_file_path)
+    sha256 = file_hash(nc_file_path)
+    if (entry and entry.get("sha256") == sha256 and entry.get("variables") == variables
+            and outputs_exist(entry, root_folder)):
+        outputs = entry["outputs"]
+        converted = False
+    else:
+        outputs = [os.path.relpath(output, root_folder) for output in convert_nc_file(nc_file_path, size, variables)]
+        converted = True
+
+    entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256,
+             "variables": variables, "outputs": outputs}
+    return entry, converted
+
+def extract_and_save_rasters(root_folder, parallel=True, workers=max_workers, size=block_size, force=False,
+                             variables=selected_variables, nc_files=None):
+    manifest = {} if force else load_manifest(root_folder)
+
+    # Keep only the scenes that are new or changed since the last run (nc_files limits the run to these files)
+    pending = []
+    for nc_file_path in find_nc_files(root_folder) if nc_files is None else nc_files:
+        key = os.path.relpath(nc_file_path, root_folder)
+        if is_up_to_date(manifest.get(key), nc_file_path, root_folder, variables):
+            continue
+        pending.append((key, nc_file_path))
+    print(f"{len(pending)} scene(s) to convert")
+
+    def record(key, entry, converted):
+        # Save the manifest after every scene so a crash only loses the scenes still in progress
+        manifest[key] = entry
+        save_manifest(root_folder, manifest)
+        print(f"{'Converted' if converted else 'Unchanged'} {key} ({len(entry['outputs'])} variables)")
+
+    if not parallel:
+        for key, nc_file_path in pending:
+            try:
+                record(key, *update_scene(nc_file_path, root_folder, manifest.get(key), size, variables))
+            except Exception as e:
+                print(f"Error converting {nc_file_path}: {e}")
+        return
+
+    # Convert the scenes in parallel, one scene per worker
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(update_scene, nc_file_path, root_folder, manifest.get(key), size, variables): key
+                   for key, nc_file_path in pending}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                record(key, *future.result())
+            except Exception as e:
+                print(f"Error converting {key}: {e}")
+
+if __name__ == "__main__":
+    # Call the function, specifying the root folder
+    extract_and_save_rasters("E:\\Thesis\\Chapter_3\\RS_Data\\ACOLITE_Outputs")
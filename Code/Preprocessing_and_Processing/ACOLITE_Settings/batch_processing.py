@@ -1,22 +1,214 @@
-# -----------------------------Header information------------------------------
-# Author: Ali Reza Shahvaran
-# Filename: batch_processing.py
-# License: CC BY 4.0
-# ----------------------------------------------------------------------------
-# Description: This script appears to be set up for batch processing of remote sensing data using the ACOLITE software. It includes environment setup and execution of ACOLITE with specified settings.
-# ----------------------------------------------------------------------------
-# Programming Language: Python 3.0
-# Libraries: (The script includes environment setup but does not directly import Python libraries in the initial part of the code)
-# ----------------------------------------------------------------------------
-# Input: Processes data using ACOLITE software as per the settings specified.
-# ----------------------------------------------------------------------------
-# Output: The specific output format is not detailed in the initial part of the code.
-# ----------------------------------------------------------------------------
-
-
-# conda create -n acolite -c conda-forge python=3
-# conda activate acolite
-# conda install -c conda-forge numpy matplotlib scipy gdal pyproj scikit-image pyhdf pyresample netcdf4 h5py requests pygrib  cartopy
-
-# cd "C:\Users\PHYS3009\Desktop\acolite_py_win_20231023.0\acolite_py_win"
-# dist\acolite\acolite.exe --cli --settings=C:\Users\PHYS3009\Desktop\acolite_py_win_20231023.0\Python\settings.txt
\ No newline at end of file
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: batch_processing.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script runs the ACOLITE batch processing of the Landsat 8/9 scenes. The year-long scene lists written by "inputfile.py" are split into one job per scene, each with its own settings file generated from "settings.txt", and several ACOLITE processes run at the same time. The number of concurrent jobs is limited by the available memory, counting the memory of the jobs that are still starting up. The status, return code and duration of every scene are recorded, so a failed scene does not stop the others and a re-run skips the scenes already processed. Scenes rejected by the QA pre-filter ("Scene_Prefilter.py") are not sent to ACOLITE.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, json, time, sys, subprocess, psutil (optional), concurrent.futures, Scene_Prefilter
+# ----------------------------------------------------------------------------
+# Input: The scene lists (inputfile<year>.txt), the settings template (settings.txt) and the ACOLITE executable.
+# ----------------------------------------------------------------------------
+# Output: The ACOLITE outputs in one folder per year, and the per-scene settings, logs and status file (status.json) in the job folder.
+# ----------------------------------------------------------------------------
+
+
+# conda create -n acolite -c conda-forge python=3
+# conda activate acolite
+# conda install -c conda-forge numpy matplotlib scipy gdal pyproj scikit-image pyhdf pyresample netcdf4 h5py requests pygrib  cartopy
+
+# cd "C:\Users\PHYS3009\Desktop\acolite_py_win_20231023.0\acolite_py_win"
+# dist\acolite\acolite.exe --cli --settings=C:\Users\PHYS3009\Desktop\acolite_py_win_20231023.0\Python\settings.txt
+
+import os
+import json
+import time
+import sys
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Scene_Prefilter.py is in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Scene_Prefilter
+
+# psutil gives the available memory on every platform; without it os.sysconf is used where it exists
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# ACOLITE command (any executable that accepts "--settings=<file>" can be used, e.g. a stub for testing)
+acolite_command = ["C:\\Users\\PHYS3009\\Desktop\\acolite_py_win_20231023.0\\acolite_py_win\\dist\\acolite\\acolite.exe", "--cli"]
+
+# Scene lists and settings template
+settings_folder = "C:\\Users\\PHYS3009\\Desktop\\acolite_py_win_20231023.0\\Python"
+settings_template = os.path.join(settings_folder, "settings.txt")
+years = range(2013, 2024)
+
+# ACOLITE output folder (one subfolder per year)
+output_base_dir = "E:/Thesis/Chapter_3/RS_Data/ACOLITE_Outputs"
+
+# Per-scene settings, logs and the status file
+job_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\ACOLITE_Jobs"
+status_name = "status.json"
+
+# Concurrency: at most max_jobs ACOLITE processes, and only as many as the available memory allows
+max_jobs = 4
+memory_per_job_gb = 6
+memory_reserve_gb = 4
+
+# Seconds an ACOLITE process takes to allocate its memory; until then its memory_per_job_gb is counted as already in use
+memory_ramp_s = 120
+
+# Time limit of one scene in seconds (None waits for ACOLITE to finish)
+job_timeout = None
+
+def read_scene_list(list_file):
+    # Scene folders written by inputfile.py, separated by commas
+    with open(list_file, 'r') as file:
+        return [scene.strip() for scene in file.read().split(',') if scene.strip()]
+
+def scene_jobs(years=years, folder=settings_folder):
+    # One job per scene: (scene ID, year, Level-1 scene folder)
+    jobs = []
+    for year in years:
+        list_file = os.path.join(folder, f"inputfile{year}.txt")
+        if not os.path.exists(list_file):
+            print(f"No scene list for {year}: {list_file}")
+            continue
+        for scene_folder in read_scene_list(list_file):
+            scene_id = os.path.basename(scene_folder.replace('\\', '/').rstrip('/'))
+            jobs.append((scene_id, year, scene_folder))
+    return jobs
+
+def write_job_settings(template_file, scene_folder, output_dir, settings_file):
+    # Copy the template, pointing "inputfile" to the scene and "output" to the folder of its year
+    with open(template_file, 'r') as file:
+        lines = file.read().splitlines()
+    settings = [f"## Written by batch_processing.py at {time.strftime('%Y-%m-%d %H:%M:%S')}"]
+    for line in lines:
+        key = line.split('=', 1)[0].strip()
+        if line.startswith('#') or key in ("inputfile", "output"):
+            continue
+        settings.append(line)
+    settings += [f"inputfile={scene_folder}", f"output={output_dir}"]
+    with open(settings_file, 'w') as file:
+        file.write('\n'.join(settings) + '\n')
+
+def load_status(folder=job_dir):
+    status_path = os.path.join(folder, status_name)
+    if not os.path.exists(status_path):
+        return {}
+    try:
+        with open(status_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Could not read the status file {status_path}, starting from scratch: {e}")
+        return {}
+
+def save_status(status, folder=job_dir):
+    # Write to a temporary file first so an interrupted write never corrupts the status file
+    status_path = os.path.join(folder, status_name)
+    with open(status_path + ".tmp", 'w') as file:
+        json.dump(status, file, indent=2, sort_keys=True)
+    os.replace(status_path + ".tmp", status_path)
+
+def available_memory_gb():
+    if psutil is not None:
+        return psutil.virtual_memory().available / 1024 ** 3
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / 1024 ** 3
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def job_limit(running, starting=0, limit=max_jobs, per_job_gb=memory_per_job_gb, reserve_gb=memory_reserve_gb,
+              available_gb=available_memory_gb):
+    # Number of jobs allowed to run now; the memory of the jobs past their start-up is already out of the available memory,
+    # the memory of the starting jobs (not allocated yet) is subtracted here. available_gb is the memory probe (GB or None)
+    available = available_gb()
+    if available is None:
+        return limit
+    allowed = running + int((available - reserve_gb - starting * per_job_gb) // per_job_gb)
+    # At least one job runs, even when memory is short
+    return max(1, min(limit, allowed))
+
+def starting_jobs(started, ramp_s=memory_ramp_s):
+    # Jobs started less than ramp_s seconds ago
+    now = time.time()
+    return sum(now - start < ramp_s for start in started.values())
+
+def run_job(scene_id, settings_file, log_file, command=acolite_command, timeout=job_timeout):
+    # Run ACOLITE on one scene, with its output written to the scene log
+    start = time.time()
+    with open(log_file, 'w') as log:
+        try:
+            result = subprocess.run(command + [f"--settings={settings_file}"], stdout=log, stderr=subprocess.STDOUT, timeout=timeout)
+            returncode = result.returncode
+        except subprocess.TimeoutExpired:
+            log.write(f"\nTimed out after {timeout} s\n")
+            returncode = "timeout"
+        except OSError as e:
+            log.write(f"\nCould not start ACOLITE: {e}\n")
+            returncode = "not started"
+    return scene_id, returncode, time.time() - start
+
+def run_batch(jobs, command=acolite_command, template_file=settings_template, output_dir=output_base_dir,
+              folder=job_dir, limit=max_jobs, timeout=job_timeout, available_gb=available_memory_gb):
+    os.makedirs(folder, exist_ok=True)
+    status = load_status(folder)
+
+    # Scenes that completed in an earlier run are skipped; failed and interrupted scenes are run again
+    remaining = [job for job in jobs if status.get(job[0], {}).get("status") != "done"]
+    # Scenes rejected by the pre-filter are recorded but never run (a scene accepted after a threshold change runs again)
+    pending = []
+    for scene_id, year, scene_folder in remaining:
+        if Scene_Prefilter.is_rejected(scene_id):
+            status[scene_id] = {"status": "rejected", "year": year, "scene": scene_folder}
+        else:
+            pending.append((scene_id, year, scene_folder))
+    # Saved now, as the loop below does not run when every remaining scene is rejected
+    save_status(status, folder)
+    print(f"{len(jobs) - len(remaining)} scene(s) already processed, {len(remaining) - len(pending)} rejected by the pre-filter, "
+          f"{len(pending)} to process")
+
+    running, started = {}, {}
+    with ThreadPoolExecutor(max_workers=limit) as executor:
+        while pending or running:
+            # Start jobs while the concurrency and memory limits allow
+            while pending and len(running) < job_limit(len(running), starting_jobs(started), limit, available_gb=available_gb):
+                scene_id, year, scene_folder = pending.pop(0)
+                year_output_dir = f"{output_dir}/{year}"
+                os.makedirs(year_output_dir, exist_ok=True)
+                settings_file = os.path.join(folder, f"{scene_id}_settings.txt")
+                log_file = os.path.join(folder, f"{scene_id}.log")
+                write_job_settings(template_file, scene_folder, year_output_dir, settings_file)
+                status[scene_id] = {"status": "running", "year": year, "scene": scene_folder, "log": log_file,
+                                    "started": time.strftime('%Y-%m-%d %H:%M:%S')}
+                future = executor.submit(run_job, scene_id, settings_file, log_file, command, timeout)
+                running[future], started[future] = scene_id, time.time()
+            save_status(status, folder)
+
+            # Wake up when a job finishes or, while scenes are waiting, when the starting jobs have allocated their memory
+            done, _ = wait(running, timeout=memory_ramp_s if pending else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                running.pop(future)
+                started.pop(future)
+                scene_id, returncode, elapsed = future.result()
+                # Save the status after every scene so an interruption only loses the scenes still running
+                status[scene_id].update(status="done" if returncode == 0 else "failed", returncode=returncode,
+                                        elapsed_s=round(elapsed, 1))
+                print(f"{scene_id}: {status[scene_id]['status']} ({elapsed:.0f} s)")
+            save_status(status, folder)
+
+    failed = sorted(scene_id for scene_id, entry in status.items() if entry.get("status") == "failed")
+    if failed:
+        print(f"{len(failed)} scene(s) failed, see the logs in {folder}: {', '.join(failed)}")
+    return status
+
+def main():
+    jobs = scene_jobs(years, settings_folder)
+    run_batch(jobs)
+
+if __name__ == "__main__":
+    main()
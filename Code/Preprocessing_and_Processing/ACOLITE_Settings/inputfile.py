@@ -1,47 +1,46 @@
-# -----------------------------Header information------------------------------
-# Author: Ali Reza Shahvaran
-# Filename: inputfile.py
-# License: CC BY 4.0
-# ----------------------------------------------------------------------------
-# Description: This script is designed to find directories containing .TIF files and writes these directory paths to an output file. It traverses a root directory, identifies relevant directories, and records them.
-# ----------------------------------------------------------------------------
-# Programming Language: Python 3.0
-# Libraries: os
-# ----------------------------------------------------------------------------
-# Input: Scans a root directory for .TIF files.
-# ----------------------------------------------------------------------------
-# Output: Writes the list of directories containing .TIF files to an output file.
-# ----------------------------------------------------------------------------
-
-
-import os
-
-def find_tif_directories(root_dir):
-    tif_dirs = []
-    
-    # Traverse the root directory and its subdirectories
-    for dirpath, dirnames, filenames in os.walk(root_dir):
-        # Look for .tif files in the current directory
-        if any(filename.endswith('.TIF') for filename in filenames):
-            tif_dirs.append(dirpath)
-            
-    return tif_dirs
-
-def write_directories_to_file(directories, output_file):
-    # Writing the directories to the output file separated by commas
-    with open(output_file, 'w') as file:
-        file.write(','.join(directories))
-
-# Loop over the years from 2013 to 2023
-for year in range(2013, 2024):
-    # Root directory to start the search
-    root_dir = f"E:\\Thesis\\Chapter_3\\RS_Data\\Level_1\\{year}"
-
-    # Output file to write the directories containing .tif files
-    output_file = f"C:\\Users\\PHYS3009\\Desktop\\acolite_py_win_20231023.0\\Python\\inputfile{year}.txt"
-
-    # Finding directories containing .tif files
-    tif_directories = find_tif_directories(root_dir)
-
-    # Writing the directories to the output file
-    write_directories_to_file(tif_directories, output_file)
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: inputfile.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script is designed to find directories containing .TIF files and writes these directory paths to an output file. It traverses a root directory, identifies relevant directories, and records them.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, sys, Scene_Catalog
+# ----------------------------------------------------------------------------
+# Input: Scans a root directory for .TIF files.
+# ----------------------------------------------------------------------------
+# Output: Writes the list of directories containing .TIF files to an output file.
+# ----------------------------------------------------------------------------
+
+
+import os
+import sys
+
+# Scene_Catalog.py is in the parent folder
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Scene_Catalog
+
+def find_tif_directories(root_dir):
+    # Level-1 product folders (which hold the .TIF band files) below the root directory, from the scene catalog
+    scene_folders = Scene_Catalog.find_scenes(root_dir, kind="dir")
+    return [path for path in scene_folders if Scene_Catalog.parse_scene_name(os.path.basename(path))["level"].startswith("L1")]
+
+def write_directories_to_file(directories, output_file):
+    # Writing the directories to the output file separated by commas
+    with open(output_file, 'w') as file:
+        file.write(','.join(directories))
+
+# Loop over the years from 2013 to 2023
+for year in range(2013, 2024):
+    # Root directory to start the search
+    root_dir = f"E:\\Thesis\\Chapter_3\\RS_Data\\Level_1\\{year}"
+
+    # Output file to write the directories containing .tif files
+    output_file = f"C:\\Users\\PHYS3009\\Desktop\\acolite_py_win_20231023.0\\Python\\inputfile{year}.txt"
+
+    # Finding directories containing .tif files
+    tif_directories = find_tif_directories(root_dir)
+
+    # Writing the directories to the output file
+    write_directories_to_file(tif_directories, output_file)
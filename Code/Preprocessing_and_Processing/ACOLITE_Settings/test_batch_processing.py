@@ -0,0 +1,59 @@
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: test_batch_processing.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script checks the memory limit of "batch_processing.py" with a stubbed memory probe and a stub ACOLITE executable that records when it runs, so no ACOLITE installation is needed.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, sys, pytest, batch_processing
+# ----------------------------------------------------------------------------
+# Input: None (the scene folders, settings template and outputs are created in a temporary folder).
+# ----------------------------------------------------------------------------
+# Output: None (run with "python -m pytest").
+# ----------------------------------------------------------------------------
+
+import os
+import sys
+
+# batch_processing.py is in the same folder
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import batch_processing
+
+def peak_concurrent_jobs(events_file):
+    # Largest number of stub processes running at the same time, from their start (+1) and end (-1) times
+    with open(events_file, 'r') as file:
+        events = sorted(tuple(float(value) for value in line.split()) for line in file if line.strip())
+    concurrent = peak = 0
+    for _, change in events:
+        concurrent += change
+        peak = max(peak, concurrent)
+    return peak
+
+def run_stub_batch(folder, available_gb, jobs=4):
+    events_file = os.path.join(folder, "events.txt")
+    template_file = os.path.join(folder, "settings.txt")
+    with open(template_file, 'w') as file:
+        file.write("l2w_parameters=rhow_*\n")
+    # Stub ACOLITE: records its start and end times and runs for one second
+    stub = [sys.executable, "-c", "import sys, time; log = open(sys.argv[1], 'a'); log.write(f'{time.time()} 1\\n'); log.flush(); "
+            "time.sleep(1); log.write(f'{time.time()} -1\\n')", events_file]
+    test_jobs = [(f"scene_{index}", 2013, folder) for index in range(jobs)]
+    status = batch_processing.run_batch(test_jobs, stub, template_file, os.path.join(folder, "outputs"),
+                                        os.path.join(folder, "jobs"), limit=4, available_gb=lambda: available_gb)
+    return status, peak_concurrent_jobs(events_file)
+
+def test_memory_limits_concurrent_jobs(tmp_path):
+    # 11 GB available, 6 GB per job and a 4 GB reserve: only one job at a time
+    status, peak = run_stub_batch(str(tmp_path), available_gb=11)
+    assert peak == 1
+    assert all(entry["status"] == "done" for entry in status.values())
+
+def test_enough_memory_runs_up_to_max_jobs(tmp_path):
+    status, peak = run_stub_batch(str(tmp_path), available_gb=40)
+    assert peak == 4
+
+def test_memory_between_limits(tmp_path):
+    # 17 GB: (17 - 4) // 6 = 2 jobs
+    status, peak = run_stub_batch(str(tmp_path), available_gb=17)
+    assert peak == 2
@@ -1,130 +1,326 @@
-# -----------------------------Header information------------------------------
-# Author: Ali Reza Shahvaran
-# Filename: Band_Math.py
-# License: CC BY 4.0
-# ----------------------------------------------------------------------------
-# Description: This script processes raster data using band mathematics. It involves reading raster files, applying mathematical operations, and handling concurrent processing.
-# ----------------------------------------------------------------------------
-# Programming Language: Python 3.0
-# Libraries: os, rasterio, numpy, concurrent.futures, logging
-# ----------------------------------------------------------------------------
-# Input: Processes raster data, specifically handling exceptions for certain folders.
-# ----------------------------------------------------------------------------
-# Output: The specific output format is not detailed in the initial part of the code.
-# ----------------------------------------------------------------------------
-
-import os
-import rasterio
-from rasterio.enums import Resampling
-import numpy as np
-from concurrent.futures import ProcessPoolExecutor
-import logging
-
-# Setup logging
-logging.basicConfig(filename='chl-a_processing.log', level=logging.INFO)
-
-skip_folders = [
-                "L8_OLI_2013_06_22_15_59_31_017030_L2W",
-                "L8_OLI_2013_06_13_16_05_47_018030_L2W",
-                "L8_OLI_2014_12_02_15_57_48_017030_L2W",
-                "L8_OLI_2014_11_16_15_57_49_017030_L2W",
-                "L8_OLI_2014_05_08_15_57_13_017030_L2W",
-                "L8_OLI_2015_01_26_16_03_45_018030_L2W",
-                "L8_OLI_2015_05_11_15_56_40_017030_L2W",
-                "L8_OLI_2015_10_02_15_57_38_017030_L2W",
-                "L8_OLI_2015_11_26_16_03_57_018030_L2W",
-                "L8_OLI_2016_01_22_15_57_42_017030_L2W",
-                "L8_OLI_2017_12_17_16_03_58_018030_L2W",
-                "L8_OLI_2017_12_10_15_57_45_017030_L2W",
-                "L8_OLI_2017_11_15_16_04_02_018030_L2W",
-                "L8_OLI_2017_10_23_15_57_55_017030_L2W",
-                "L8_OLI_2017_10_14_16_04_05_018030_L2W",
-                "L8_OLI_2017_07_26_16_03_43_018030_L2W",
-                "L8_OLI_2017_07_10_16_03_36_018030_L2W",
-                "L8_OLI_2017_04_30_15_56_54_017030_L2W",
-                "L8_OLI_2018_09_08_15_57_12_017030_L2W",
-                "L8_OLI_2018_06_20_15_56_34_017030_L2W",
-                "L8_OLI_2018_04_24_16_03_01_018030_L2W",
-                "L8_OLI_2018_01_27_15_57_32_017030_L2W",
-                "L8_OLI_2019_11_30_15_57_56_017030_L2W",
-                "L8_OLI_2019_11_05_16_04_10_018030_L2W",
-                "L8_OLI_2019_05_22_15_57_15_017030_L2W",
-                "L8_OLI_2020_04_29_16_03_16_018030_L2W",
-                "L8_OLI_2020_10_15_15_57_57_017030_L2W",
-                "L8_OLI_2020_11_07_16_04_05_018030_L2W",
-                "L9_OLI_2021_11_12_15_58_41_017030_L2W",
-                "L8_OLI_2021_07_21_16_03_45_018030_L2W",
-                "L8_OLI_2022_01_22_15_57_47_017030_L2W",
-                "L8_OLI_2022_03_11_15_57_35_017030_L2W",
-                "L8_OLI_2022_05_05_16_03_38_018030_L2W",
-                "L8_OLI_2022_06_06_16_03_52_018030_L2W",
-                "L8_OLI_2022_10_12_16_04_18_018030_L2W",
-                "L8_OLI_2022_10_28_16_04_26_018030_L2W",
-                "L9_OLI_2022_03_10_16_03_49_018030_L2W",
-                "L9_OLI_2022_05_06_15_57_18_017030_L2W",
-                "L9_OLI_2022_11_05_16_04_13_018030_L2W",
-                "L9_OLI_2023_01_01_15_58_04_017030_L2W",
-                "L8_OLI_2023_05_08_16_03_09_018030_L2W",
-                "L8_OLI_2023_04_06_16_03_27_018030_L2W"
-]
-
-def process_image(folder_path):
-    try:
-        # Define file names based on Landsat version
-        folder_name = os.path.basename(folder_path)
-        # Skip processing if the folder is in the skip list
-        if folder_name in skip_folders:
-            logging.info(f"Skipping folder {folder_name}")
-            return
-
-        blue_band_name = "rhow_483.tif" if folder_name.startswith("L8") else "rhow_482.tif"
-        red_band_name = "rhow_655.tif" if folder_name.startswith("L8") else "rhow_654.tif"
-
-        # Construct file paths
-        blue_band_path = os.path.join(folder_path, blue_band_name)
-        red_band_path = os.path.join(folder_path, red_band_name)
-
-        # Read the blue and red bands
-        with rasterio.open(blue_band_path) as blue_src, rasterio.open(red_band_path) as red_src:
-            blue_band = blue_src.read(1, out_dtype='float64')
-            red_band = red_src.read(1, out_dtype='float64')
-
-            # Calculate Chl-a
-            chl_a = np.where((blue_band == 0) | (red_band == 0), np.nan, 
-                             ((10 ** (1.48 * 10 ** (-0.3 * (blue_band / red_band))))-1))
-
-            # Truncate to 1 decimal places
-            chl_a = np.around(chl_a, decimals=1)
-
-            # Copy metadata and update
-            meta = blue_src.meta
-            meta.update(dtype=rasterio.float64, nodata=np.nan)
-
-            # Save the output
-            output_folder = os.path.basename(folder_path).split('_')[2] 
-            output_path = os.path.join("E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs", output_folder)
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            
-            output_file = os.path.join(output_path, os.path.basename(folder_path) + ".tif")
-            with rasterio.open(output_file, 'w', **meta) as dst:
-                dst.write(chl_a, 1)
-
-            logging.info(f"Processed {folder_path} successfully.")
-
-    except Exception as e:
-        logging.error(f"Error processing {folder_path}: {e}")
-
-def main():
-    base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\ACOLITE_Outputs"
-    
-    # Find all directories ending with 'L2W'
-    l2w_folders = [os.path.join(dp, f) for dp, dn, filenames in os.walk(base_dir) 
-                   for f in dn if f.endswith('L2W')]
-    
-    # Process each folder in parallel
-    with ProcessPoolExecutor() as executor:
-        executor.map(process_image, l2w_folders)
-
-if __name__ == "__main__":
-    main()
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: Band_Math.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script processes raster data using band mathematics. It involves reading raster files, applying mathematical operations, and handling concurrent processing. In windowed mode the bands are processed block by block in float32, so the memory used per worker stays within a configurable budget. Any set of the registered algorithms can be evaluated in one pass over the bands they need, producing one multi-band raster per scene. A statistics sidecar (see "Raster_Sidecars.py") is written next to every output.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, rasterio, numpy, numexpr (optional), concurrent.futures, logging, Raster_Sidecars, Scene_Catalog, Scene_Prefilter
+# ----------------------------------------------------------------------------
+# Input: Processes raster data, specifically handling exceptions for certain folders.
+# ----------------------------------------------------------------------------
+# Output: The specific output format is not detailed in the initial part of the code.
+# ----------------------------------------------------------------------------
+
+import os
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.windows import Window
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import logging
+
+import Raster_Sidecars
+import Scene_Catalog
+import Scene_Prefilter
+
+# numexpr evaluates the algorithm expressions without full-size intermediate arrays; NumPy is used when it is missing
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+# Setup logging
+logging.basicConfig(filename='chl-a_processing.log', level=logging.INFO)
+
+# Output directory (one subfolder per year)
+output_base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs"
+
+# Process the bands block by block instead of reading them whole
+windowed = True
+
+# Memory budget per worker for windowed processing (MB)
+memory_budget_mb = 256
+
+# Number of folders processed at the same time (None uses all available cores)
+max_workers = None
+
+# Algorithms evaluated together into one multi-band raster per scene (None computes the Chl-a band only)
+# e.g. ["chla_blue_red", "chla_oc2", "chla_oc3", "ratio_blue_green", "nd_green_red"]
+selected_algorithms = None
+
+# Output directory for the multi-band algorithm rasters (one subfolder per year)
+algorithms_output_base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_Algorithms"
+
+# Band names of L9 (OLI-2) scenes that differ from L8 (OLI)
+l9_band_names = {
+    "rhow_483": "rhow_482",
+    "rhow_655": "rhow_654",
+}
+
+# Registry of Chl-a and index algorithms: the bands each one needs and the expression evaluated on them
+# Expressions use the L8 band names as variables; pixels where any of the bands is zero are set to NaN
+algorithms = {}
+
+def register_algorithm(name, bands, expression, decimals=None):
+    algorithms[name] = {"bands": bands, "expression": expression, "decimals": decimals}
+
+# Blue/red algorithm used for the Chl-a maps
+register_algorithm("chla_blue_red", ["rhow_483", "rhow_655"],
+                   "10 ** (1.48 * 10 ** (-0.3 * (rhow_483 / rhow_655))) - 1", decimals=1)
+# NASA OC2 and OC3 band-ratio polynomials with the OLI coefficients
+register_algorithm("chla_oc2", ["rhow_483", "rhow_561"],
+                   "10 ** (0.1977 + log10(rhow_483 / rhow_561) * (-1.8117 + log10(rhow_483 / rhow_561) * (1.9743"
+                   " + log10(rhow_483 / rhow_561) * (-2.5635 + log10(rhow_483 / rhow_561) * -0.7218))))")
+register_algorithm("chla_oc3", ["rhow_443", "rhow_483", "rhow_561"],
+                   "10 ** (0.2412 + log10(where(rhow_443 > rhow_483, rhow_443, rhow_483) / rhow_561) * (-2.0546"
+                   " + log10(where(rhow_443 > rhow_483, rhow_443, rhow_483) / rhow_561) * (1.1776"
+                   " + log10(where(rhow_443 > rhow_483, rhow_443, rhow_483) / rhow_561) * (-0.5538"
+                   " + log10(where(rhow_443 > rhow_483, rhow_443, rhow_483) / rhow_561) * -0.4570))))")
+# Band ratios and normalized differences
+register_algorithm("ratio_blue_red", ["rhow_483", "rhow_655"], "rhow_483 / rhow_655")
+register_algorithm("ratio_blue_green", ["rhow_483", "rhow_561"], "rhow_483 / rhow_561")
+register_algorithm("ratio_green_red", ["rhow_561", "rhow_655"], "rhow_561 / rhow_655")
+register_algorithm("nd_green_red", ["rhow_561", "rhow_655"], "(rhow_561 - rhow_655) / (rhow_561 + rhow_655)")
+
+# Scenes rejected on inspection; scenes rejected by the QA pre-filter (see "Scene_Prefilter.py") are skipped as well
+skip_folders = [
+                "L8_OLI_2013_06_22_15_59_31_017030_L2W",
+                "L8_OLI_2013_06_13_16_05_47_018030_L2W",
+                "L8_OLI_2014_12_02_15_57_48_017030_L2W",
+                "L8_OLI_2014_11_16_15_57_49_017030_L2W",
+                "L8_OLI_2014_05_08_15_57_13_017030_L2W",
+                "L8_OLI_2015_01_26_16_03_45_018030_L2W",
+                "L8_OLI_2015_05_11_15_56_40_017030_L2W",
+                "L8_OLI_2015_10_02_15_57_38_017030_L2W",
+                "L8_OLI_2015_11_26_16_03_57_018030_L2W",
+                "L8_OLI_2016_01_22_15_57_42_017030_L2W",
+                "L8_OLI_2017_12_17_16_03_58_018030_L2W",
+                "L8_OLI_2017_12_10_15_57_45_017030_L2W",
+                "L8_OLI_2017_11_15_16_04_02_018030_L2W",
+                "L8_OLI_2017_10_23_15_57_55_017030_L2W",
+                "L8_OLI_2017_10_14_16_04_05_018030_L2W",
+                "L8_OLI_2017_07_26_16_03_43_018030_L2W",
+                "L8_OLI_2017_07_10_16_03_36_018030_L2W",
+                "L8_OLI_2017_04_30_15_56_54_017030_L2W",
+                "L8_OLI_2018_09_08_15_57_12_017030_L2W",
+                "L8_OLI_2018_06_20_15_56_34_017030_L2W",
+                "L8_OLI_2018_04_24_16_03_01_018030_L2W",
+                "L8_OLI_2018_01_27_15_57_32_017030_L2W",
+                "L8_OLI_2019_11_30_15_57_56_017030_L2W",
+                "L8_OLI_2019_11_05_16_04_10_018030_L2W",
+                "L8_OLI_2019_05_22_15_57_15_017030_L2W",
+                "L8_OLI_2020_04_29_16_03_16_018030_L2W",
+                "L8_OLI_2020_10_15_15_57_57_017030_L2W",
+                "L8_OLI_2020_11_07_16_04_05_018030_L2W",
+                "L9_OLI_2021_11_12_15_58_41_017030_L2W",
+                "L8_OLI_2021_07_21_16_03_45_018030_L2W",
+                "L8_OLI_2022_01_22_15_57_47_017030_L2W",
+                "L8_OLI_2022_03_11_15_57_35_017030_L2W",
+                "L8_OLI_2022_05_05_16_03_38_018030_L2W",
+                "L8_OLI_2022_06_06_16_03_52_018030_L2W",
+                "L8_OLI_2022_10_12_16_04_18_018030_L2W",
+                "L8_OLI_2022_10_28_16_04_26_018030_L2W",
+                "L9_OLI_2022_03_10_16_03_49_018030_L2W",
+                "L9_OLI_2022_05_06_15_57_18_017030_L2W",
+                "L9_OLI_2022_11_05_16_04_13_018030_L2W",
+                "L9_OLI_2023_01_01_15_58_04_017030_L2W",
+                "L8_OLI_2023_05_08_16_03_09_018030_L2W",
+                "L8_OLI_2023_04_06_16_03_27_018030_L2W"
+]
+
+def skip_scene(folder_name):
+    return folder_name in skip_folders or Scene_Prefilter.is_rejected(folder_name)
+
+def band_name(folder_name, band):
+    # Define band names based on Landsat version
+    return band if folder_name.startswith("L8") else l9_band_names.get(band, band)
+
+def band_paths(folder_path):
+    # Construct the blue and red band file paths
+    folder_name = os.path.basename(folder_path)
+    return (os.path.join(folder_path, band_name(folder_name, "rhow_483") + ".tif"),
+            os.path.join(folder_path, band_name(folder_name, "rhow_655") + ".tif"))
+
+def output_file_path(folder_path, base_dir=None):
+    # Save the output in a folder named after the acquisition year
+    output_folder = os.path.basename(folder_path).split('_')[2]
+    output_path = os.path.join(base_dir or output_base_dir, output_folder)
+    os.makedirs(output_path, exist_ok=True)
+    return os.path.join(output_path, os.path.basename(folder_path) + ".tif")
+
+def calculate_chla(blue_band, red_band):
+    # Calculate Chl-a in place on the ratio array, keeping the dtype of the input bands
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chl_a = blue_band / red_band
+        chl_a *= -0.3
+        np.power(10, chl_a, out=chl_a)
+        chl_a *= 1.48
+        np.power(10, chl_a, out=chl_a)
+        chl_a -= 1
+    chl_a[(blue_band == 0) | (red_band == 0)] = np.nan
+
+    # Truncate to 1 decimal places
+    return np.around(chl_a, decimals=1, out=chl_a)
+
+def evaluate_expression(expression, bands):
+    # numexpr evaluates the expression in one pass over cache-sized chunks
+    if ne is not None:
+        return ne.evaluate(expression, local_dict=bands)
+    namespace = {"__builtins__": {}, "where": np.where, "log10": np.log10, "log": np.log, "exp": np.exp, "sqrt": np.sqrt}
+    return eval(expression, namespace, bands)
+
+def calculate_algorithms(names, bands):
+    # Evaluate every algorithm on the same window of bands
+    results = []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name in names:
+            algorithm = algorithms[name]
+            result = np.asarray(evaluate_expression(algorithm["expression"], bands), dtype=np.float32)
+            for band in algorithm["bands"]:
+                result[bands[band] == 0] = np.nan
+            if algorithm["decimals"] is not None:
+                np.around(result, decimals=algorithm["decimals"], out=result)
+            results.append(result)
+    return np.stack(results)
+
+def block_row_windows(src, budget_mb=memory_budget_mb, bytes_per_pixel=20):
+    # Full-width windows made of whole rows of internal blocks, as many as fit in the memory budget
+    # (two float32 input bands plus about three float32 temporaries per pixel)
+    block_height = src.block_shapes[0][0]
+    rows = int(budget_mb * 1024 * 1024 // (src.width * bytes_per_pixel))
+    rows = max(block_height, rows // block_height * block_height)
+    for row_off in range(0, src.height, rows):
+        yield Window(0, row_off, src.width, min(rows, src.height - row_off))
+
+def process_image(folder_path):
+    try:
+        folder_name = os.path.basename(folder_path)
+        # Skip processing if the folder is in the skip list or was rejected by the pre-filter
+        if skip_scene(folder_name):
+            logging.info(f"Skipping folder {folder_name}")
+            return
+
+        blue_band_path, red_band_path = band_paths(folder_path)
+
+        # Read the blue and red bands
+        with rasterio.open(blue_band_path) as blue_src, rasterio.open(red_band_path) as red_src:
+            blue_band = blue_src.read(1, out_dtype='float64')
+            red_band = red_src.read(1, out_dtype='float64')
+
+            # Calculate Chl-a
+            chl_a = calculate_chla(blue_band, red_band)
+
+            # Copy metadata and update
+            meta = blue_src.meta
+            meta.update(dtype=rasterio.float64, nodata=np.nan)
+
+            # Save the output
+            output_file = output_file_path(folder_path)
+            with rasterio.open(output_file, 'w', **meta) as dst:
+                dst.write(chl_a, 1)
+
+            sidecar = Raster_Sidecars.init_sidecar(output_file, meta["crs"], meta["transform"], chl_a.shape, ["chl_a"])
+            Raster_Sidecars.update_sidecar(sidecar, "chl_a", chl_a)
+            Raster_Sidecars.write_sidecar(sidecar)
+
+            logging.info(f"Processed {folder_path} successfully.")
+
+    except Exception as e:
+        logging.error(f"Error processing {folder_path}: {e}")
+
+def process_image_windowed(folder_path, budget_mb=memory_budget_mb):
+    try:
+        folder_name = os.path.basename(folder_path)
+        # Skip processing if the folder is in the skip list or was rejected by the pre-filter
+        if skip_scene(folder_name):
+            logging.info(f"Skipping folder {folder_name}")
+            return
+
+        blue_band_path, red_band_path = band_paths(folder_path)
+
+        with rasterio.open(blue_band_path) as blue_src, rasterio.open(red_band_path) as red_src:
+            # Pre-create the float32 output with the same block layout as the input
+            profile = blue_src.profile
+            profile.update(dtype=rasterio.float32, nodata=np.nan)
+
+            output_file = output_file_path(folder_path)
+            sidecar = Raster_Sidecars.init_sidecar(output_file, profile["crs"], profile["transform"],
+                                                   (profile["height"], profile["width"]), ["chl_a"])
+            with rasterio.open(output_file, 'w', **profile) as dst:
+                # Calculate Chl-a one window at a time
+                for window in block_row_windows(blue_src, budget_mb):
+                    blue_band = blue_src.read(1, window=window, out_dtype='float32')
+                    red_band = red_src.read(1, window=window, out_dtype='float32')
+                    chl_a = calculate_chla(blue_band, red_band)
+                    dst.write(chl_a, 1, window=window)
+                    Raster_Sidecars.update_sidecar(sidecar, "chl_a", chl_a, window.row_off, window.col_off)
+            Raster_Sidecars.write_sidecar(sidecar)
+
+            logging.info(f"Processed {folder_path} successfully.")
+
+    except Exception as e:
+        logging.error(f"Error processing {folder_path}: {e}")
+
+def process_image_algorithms(folder_path, names=None, budget_mb=memory_budget_mb):
+    try:
+        folder_name = os.path.basename(folder_path)
+        # Skip processing if the folder is in the skip list or was rejected by the pre-filter
+        if skip_scene(folder_name):
+            logging.info(f"Skipping folder {folder_name}")
+            return
+
+        names = names or selected_algorithms
+
+        # Union of the bands needed by the selected algorithms, each read once per window
+        bands = []
+        for name in names:
+            bands.extend(band for band in algorithms[name]["bands"] if band not in bands)
+
+        sources = {band: rasterio.open(os.path.join(folder_path, band_name(folder_name, band) + ".tif")) for band in bands}
+        try:
+            first_src = sources[bands[0]]
+            profile = first_src.profile
+            profile.update(dtype=rasterio.float32, nodata=np.nan, count=len(names))
+
+            output_file = output_file_path(folder_path, algorithms_output_base_dir)
+            sidecar = Raster_Sidecars.init_sidecar(output_file, profile["crs"], profile["transform"],
+                                                   (profile["height"], profile["width"]), names)
+            with rasterio.open(output_file, 'w', **profile) as dst:
+                for index, name in enumerate(names, start=1):
+                    dst.set_band_description(index, name)
+
+                # Input bands, results and about two temporaries per pixel, all float32
+                bytes_per_pixel = 4 * (len(bands) + len(names) + 2)
+                for window in block_row_windows(first_src, budget_mb, bytes_per_pixel):
+                    data = {band: src.read(1, window=window, out_dtype='float32') for band, src in sources.items()}
+                    results = calculate_algorithms(names, data)
+                    dst.write(results, window=window)
+                    for name, result in zip(names, results):
+                        Raster_Sidecars.update_sidecar(sidecar, name, result, window.row_off, window.col_off)
+            Raster_Sidecars.write_sidecar(sidecar)
+        finally:
+            for src in sources.values():
+                src.close()
+
+        logging.info(f"Processed {folder_path} successfully.")
+
+    except Exception as e:
+        logging.error(f"Error processing {folder_path}: {e}")
+
+def main():
+    base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\ACOLITE_Outputs"
+    
+    # Find all L2W scene folders from the scene catalog
+    l2w_folders = Scene_Catalog.find_scenes(base_dir, kind="dir", level="L2W")
+    
+    # Process each folder in parallel
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        if selected_algorithms:
+            executor.map(process_image_algorithms, l2w_folders)
+        else:
+            executor.map(process_image_windowed if windowed else process_image, l2w_folders)
+
+if __name__ == "__main__":
+    main()
@@ -1,85 +1,185 @@
-# -----------------------------Header information------------------------------
-# Author: Ali Reza Shahvaran
-# Filename: Bloom_Indicators.py
-# License: CC BY 4.0
-# ----------------------------------------------------------------------------
-# Description: This script is designed for processing TIFF files to calculate bloom indicators. It reads TIFF files, converts them to numpy arrays, and performs calculations to determine bloom intensity.
-# ----------------------------------------------------------------------------
-# Programming Language: Python 3.0
-# Libraries: os, numpy, pandas, tifffile
-# ----------------------------------------------------------------------------
-# Input: Reads TIFF files from a specified directory.
-# ----------------------------------------------------------------------------
-# Output: The script likely generates statistical data on bloom intensity (details not specified in the initial part of the code).
-# ----------------------------------------------------------------------------
-
-import os
-import numpy as np
-import pandas as pd
-import tifffile as tiff
-
-def process_tiff_file(file_path):
-    try:
-        # Read TIFF file
-        img = tiff.imread(file_path)
-        img_array = np.array(img)
-
-        # Calculating Bloom_Intensity_ugL
-        valid_pixels_intensity = img_array[(img_array >= 10.00) & (img_array <= 30.00)]
-        Bloom_Intensity_ugL = np.mean(valid_pixels_intensity) if valid_pixels_intensity.size else 0
-
-        # Calculating Bloom_Extent_km2
-        Bloom_Extent_km2 = valid_pixels_intensity.size * 0.0009
-
-        # Calculating Bloom_Severity_ugkm2L
-        Bloom_Severity_ugkm2L = Bloom_Intensity_ugL * Bloom_Extent_km2
-
-        # Calculating Data_Availibity_%
-        total_valid_pixels = img_array[(img_array >= 0.01) & (img_array <= 30.00)]
-        Area_HH_km2 = 20.6281
-        Area_WLOO_km2 = 5938.660
-        Area_WLON_km2 = 600.9387
-
-        #Data_Availibity_percent = (total_valid_pixels.size * 0.0009 * 100) / Area_HH_km2
-        #Data_Availibity_percent = (total_valid_pixels.size * 0.0009 * 100) / Area_WLOO_km2
-        Data_Availibity_percent = (total_valid_pixels.size * 0.0009 * 100) / Area_WLON_km2
-
-        return [Bloom_Intensity_ugL, Bloom_Extent_km2, Bloom_Severity_ugkm2L, Data_Availibity_percent]
-
-    except Exception as e:
-        print(f"Error processing file: {file_path}, Error: {e}")
-        return None
-
-def main():
-    
-    #directory = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_HH"
-    #directory = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLOO"
-    directory = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLON"
-
-    #output_file = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_HH\\Chla_Outputs_HH.xlsx"
-    #output_file = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLOO\\Chla_Outputs_WLOO.xlsx"
-    output_file = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLON\\Chla_Outputs_WLON.xlsx"
-
-    data = []
-
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.tif'):
-                file_path = os.path.join(root, file)
-                result = process_tiff_file(file_path)
-                if result:
-                    data.append([file] + result)
-                else:
-                    print(f"Skipped file: {file}")
-
-    df = pd.DataFrame(data, columns=["File_Name", "Bloom_Intensity_ugL", "Bloom_Extent_km2", "Bloom_Severity_ugkm2L", "Data_Availibity_%"])
-    df["Bloom_Intensity_ugL"] = df["Bloom_Intensity_ugL"].round(3)
-    df["Bloom_Extent_km2"] = df["Bloom_Extent_km2"].round(3)
-    df["Bloom_Severity_ugkm2L"] = df["Bloom_Severity_ugkm2L"].round(3)
-    df["Data_Availibity_%"] = df["Data_Availibity_%"].round(1)
-    df.to_excel(output_file, index=False)
-
-    print("Process completed successfully.")
-
-if __name__ == "__main__":
-    main()
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: Bloom_Indicators.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script is designed for processing TIFF files to calculate bloom indicators. It reads TIFF files, converts them to numpy arrays, and performs calculations to determine bloom intensity. The indicators of all ROIs (HH, WLOO and WLON) are computed in a single pass over each unclipped Chl-a raster, using ROI masks rasterized from the shapefiles. Scenes are processed in parallel and the results are written in batches, one CSV or Parquet part file per batch, to a store keyed by scene, so an interrupted run keeps its results and resumes with the remaining scenes.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, glob, numpy, pandas, tifffile, rasterio, concurrent.futures, ROI_Masks, Scene_Catalog
+# ----------------------------------------------------------------------------
+# Input: Reads TIFF files from a specified directory and the ROI shapefiles listed in "ROI_Masks.py".
+# ----------------------------------------------------------------------------
+# Output: A results store (CSV or Parquet) and, optionally, one Excel file per ROI with the bloom intensity, extent, severity and data availability of every scene.
+# ----------------------------------------------------------------------------
+
+import os
+import glob
+import numpy as np
+import pandas as pd
+import tifffile as tiff
+import rasterio
+from concurrent.futures import ProcessPoolExecutor
+
+import ROI_Masks
+import Scene_Catalog
+
+# ROI areas (km2) used when processing rasters that were already clipped to one ROI
+Area_HH_km2 = 20.6281
+Area_WLOO_km2 = 5938.660
+Area_WLON_km2 = 600.9387
+
+columns = ["File_Name", "Bloom_Intensity_ugL", "Bloom_Extent_km2", "Bloom_Severity_ugkm2L", "Data_Availibity_%"]
+
+# Input directory (unclipped Chl-a rasters)
+directory = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs"
+
+# Results store: one part file per batch ("csv" or "parquet") in the store folder
+store_format = "csv"
+store_path = "E:\\Thesis\\Chapter_3\\RS_Data\\Bloom_Indicators\\bloom_indicators"
+
+# Number of scenes written to the store at once
+batch_size = 50
+
+# Number of scenes processed at the same time (None uses all available cores)
+max_workers = None
+
+# Excel files written from the store at the end (set export_excel to False to skip)
+export_excel = True
+output_files = {
+    "HH": "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_HH\\Chla_Outputs_HH.xlsx",
+    "WLOO": "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLOO\\Chla_Outputs_WLOO.xlsx",
+    "WLON": "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLON\\Chla_Outputs_WLON.xlsx"
+}
+
+def calculate_indicators(img_array, area_km2):
+    # Calculating Bloom_Intensity_ugL
+    valid_pixels_intensity = img_array[(img_array >= 10.00) & (img_array <= 30.00)]
+    Bloom_Intensity_ugL = np.mean(valid_pixels_intensity) if valid_pixels_intensity.size else 0
+
+    # Calculating Bloom_Extent_km2
+    Bloom_Extent_km2 = valid_pixels_intensity.size * 0.0009
+
+    # Calculating Bloom_Severity_ugkm2L
+    Bloom_Severity_ugkm2L = Bloom_Intensity_ugL * Bloom_Extent_km2
+
+    # Calculating Data_Availibity_%
+    total_valid_pixels = np.count_nonzero((img_array >= 0.01) & (img_array <= 30.00))
+    Data_Availibity_percent = (total_valid_pixels * 0.0009 * 100) / area_km2
+
+    return [Bloom_Intensity_ugL, Bloom_Extent_km2, Bloom_Severity_ugkm2L, Data_Availibity_percent]
+
+def process_tiff_file(file_path, area_km2=Area_WLON_km2):
+    try:
+        # Read TIFF file (already clipped to one ROI)
+        img = tiff.imread(file_path)
+        img_array = np.array(img)
+        return calculate_indicators(img_array, area_km2)
+
+    except Exception as e:
+        print(f"Error processing file: {file_path}, Error: {e}")
+        return None
+
+def process_tiff_file_rois(file_path, shapefiles=ROI_Masks.roi_shapefiles):
+    try:
+        # Read the unclipped TIFF file once
+        with rasterio.open(file_path) as src:
+            img_array = src.read(1)
+            masks = ROI_Masks.roi_masks(src.crs, src.transform, img_array.shape, shapefiles)
+
+        # Indicators of every ROI, with the ROI area taken from its mask; ROIs the raster does not overlap get NaN rows,
+        # so the scene is still stored (and not retried) with the rows of the other ROIs
+        return {key: calculate_indicators(img_array[mask], ROI_Masks.roi_area_km2(mask)) if mask.any() else [np.nan] * 4
+                for key, mask in masks.items()}
+
+    except Exception as e:
+        print(f"Error processing file: {file_path}, Error: {e}")
+        return None
+
+def process_scene(file_path):
+    # Rows of one scene for the results store (one row per ROI)
+    results = process_tiff_file_rois(file_path)
+    if not results:
+        return None
+    scene = os.path.splitext(os.path.basename(file_path))[0]
+    # Name the rows as the clipped files were named ("<scene>_<ROI>.tif")
+    return [[scene, key, f"{scene}_{key}.tif"] + values for key, values in results.items()]
+
+def read_part(part_file):
+    return pd.read_parquet(part_file) if part_file.endswith(".parquet") else pd.read_csv(part_file)
+
+def read_store(path=store_path, fmt=store_format):
+    part_files = sorted(glob.glob(os.path.join(path, f"*.{fmt}")))
+    # Single CSV file written by earlier versions of the store
+    if fmt == "csv" and os.path.exists(path + ".csv"):
+        part_files.insert(0, path + ".csv")
+    return pd.concat([read_part(part_file) for part_file in part_files], ignore_index=True) if part_files else None
+
+def completed_scenes(path=store_path, fmt=store_format):
+    # Scenes already in the store are not processed again
+    df = read_store(path, fmt)
+    return set() if df is None else set(df["Scene"])
+
+def append_batch(rows, path=store_path, fmt=store_format):
+    # One part file per batch, in both formats
+    df = pd.DataFrame(rows, columns=["Scene", "ROI"] + columns)
+    os.makedirs(path, exist_ok=True)
+    part_number = len(glob.glob(os.path.join(path, f"*.{fmt}")))
+    # Write to a temporary name first so an interrupted write never leaves a broken part file
+    part_file = os.path.join(path, f"part-{part_number:05d}.{fmt}")
+    if fmt == "parquet":
+        df.to_parquet(part_file + ".tmp", index=False)
+    else:
+        df.to_csv(part_file + ".tmp", index=False)
+    os.replace(part_file + ".tmp", part_file)
+
+def results_to_excel(data, output_file):
+    df = pd.DataFrame(data, columns=columns)
+    df["Bloom_Intensity_ugL"] = df["Bloom_Intensity_ugL"].round(3)
+    df["Bloom_Extent_km2"] = df["Bloom_Extent_km2"].round(3)
+    df["Bloom_Severity_ugkm2L"] = df["Bloom_Severity_ugkm2L"].round(3)
+    df["Data_Availibity_%"] = df["Data_Availibity_%"].round(1)
+    df.to_excel(output_file, index=False)
+
+def store_to_excel(path=store_path, fmt=store_format, files=output_files):
+    # One Excel file per ROI, written from the results store
+    df = read_store(path, fmt)
+    if df is None:
+        print("The results store is empty.")
+        return
+    # Rows of ROIs a scene does not overlap are left out, as no clipped file existed for them
+    df = df[df["Data_Availibity_%"].notna()]
+    for key, output_file in files.items():
+        results_to_excel(df[df["ROI"] == key].sort_values("File_Name")[columns], output_file)
+
+def main():
+    # Skip the scenes already in the store (from an earlier or interrupted run)
+    done = completed_scenes()
+    tif_files = [file_path for file_path in Scene_Catalog.find_scenes(directory, kind="tif")
+                 if os.path.splitext(os.path.basename(file_path))[0] not in done]
+    print(f"{len(done)} scene(s) already in the store, {len(tif_files)} to process")
+
+    batch = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for file_path, rows in zip(tif_files, executor.map(process_scene, tif_files, chunksize=4)):
+                if rows:
+                    batch.extend(rows)
+                else:
+                    print(f"Skipped file: {os.path.basename(file_path)}")
+
+                # Append to the store in batches so finished scenes survive an interruption
+                if len(batch) >= batch_size * len(output_files):
+                    append_batch(batch)
+                    batch = []
+    finally:
+        if batch:
+            append_batch(batch)
+
+    if export_excel:
+        store_to_excel()
+
+    print("Process completed successfully.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: Cell_Statistics.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script computes per-pixel statistics over a stack of rasters without ArcGIS. The scenes are streamed one at a time into running accumulators (Welford mean and variance, maximum, minimum and number of valid observations), so the memory used does not depend on the number of scenes. The grid is split into tiles that are processed in parallel, and all statistics come out of a single read of every scene. Median, P90 and other percentile maps come from per-pixel fixed-bin histograms over the Chl-a range, which can be merged across workers.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, math, numpy, rasterio, concurrent.futures
+# ----------------------------------------------------------------------------
+# Input: A list of rasters on the same coordinate system (e.g. the Chl-a rasters of one year).
+# ----------------------------------------------------------------------------
+# Output: One raster per statistic (MEAN, MAXIMUM, MINIMUM, STD, COUNT, MEDIAN and percentiles such as P90).
+# ----------------------------------------------------------------------------
+
+import os
+import math
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window, from_bounds
+from concurrent.futures import ProcessPoolExecutor
+
+# Size (in pixels) of the square tiles processed by each worker
+tile_size = 512
+
+# Number of tiles processed at the same time (None uses all available cores)
+max_workers = None
+
+# Fixed bins of the per-pixel histograms used for the percentiles (Chl-a range in ug/L)
+# Values below or above the range are counted in the first or last bin
+histogram_range = (0.0, 30.0)
+histogram_bin_width = 0.5
+
+def init_accumulator(shape):
+    return {
+        "count": np.zeros(shape, dtype=np.uint32),
+        "mean": np.zeros(shape, dtype=np.float64),
+        "m2": np.zeros(shape, dtype=np.float64),
+        "max": np.full(shape, -np.inf, dtype=np.float32),
+        "min": np.full(shape, np.inf, dtype=np.float32),
+    }
+
+def update_accumulator(acc, data):
+    # Welford update of the valid (non-NaN) pixels of one scene
+    valid = ~np.isnan(data)
+    acc["count"] += valid
+    with np.errstate(invalid='ignore'):
+        delta = np.where(valid, data - acc["mean"], 0.0)
+        acc["mean"] += delta / np.maximum(acc["count"], 1)
+        acc["m2"] += delta * np.where(valid, data - acc["mean"], 0.0)
+
+    # fmax/fmin ignore the NaN pixels
+    np.fmax(acc["max"], data, out=acc["max"])
+    np.fmin(acc["min"], data, out=acc["min"])
+
+def merge_accumulators(acc, other):
+    # Combine two accumulators of the same pixels (Chan et al. parallel variance)
+    count = acc["count"] + other["count"]
+    safe_count = np.maximum(count, 1)
+    delta = other["mean"] - acc["mean"]
+    acc["m2"] += other["m2"] + delta ** 2 * acc["count"] * other["count"] / safe_count
+    acc["mean"] += delta * other["count"] / safe_count
+    acc["count"] = count
+    np.fmax(acc["max"], other["max"], out=acc["max"])
+    np.fmin(acc["min"], other["min"], out=acc["min"])
+    return acc
+
+def finalize_accumulator(acc):
+    # Statistics of the pixels with at least one valid observation; the others are NaN
+    count = acc["count"]
+    observed = count > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            "MEAN": np.where(observed, acc["mean"], np.nan).astype(np.float32),
+            "MAXIMUM": np.where(observed, acc["max"], np.nan).astype(np.float32),
+            "MINIMUM": np.where(observed, acc["min"], np.nan).astype(np.float32),
+            # Population standard deviation, as ArcGIS CellStatistics
+            "STD": np.where(observed, np.sqrt(acc["m2"] / count), np.nan).astype(np.float32),
+            "COUNT": count.astype(np.float32),
+        }
+
+def histogram_edges(value_range=histogram_range, bin_width=histogram_bin_width):
+    low, high = value_range
+    return np.linspace(low, high, int(round((high - low) / bin_width)) + 1)
+
+def init_histogram(shape, edges):
+    # One count per bin and pixel (bins first, so each bin is a contiguous image)
+    return np.zeros((len(edges) - 1,) + tuple(shape), dtype=np.uint16)
+
+def update_histogram(histogram, data, edges):
+    # Each pixel adds at most one count per scene, so a plain fancy-index increment is exact
+    valid = ~np.isnan(data)
+    bins = np.floor((data[valid] - edges[0]) / (edges[1] - edges[0])).astype(np.intp)
+    np.clip(bins, 0, len(edges) - 2, out=bins)
+    rows, cols = np.nonzero(valid)
+    histogram[bins, rows, cols] += 1
+
+def merge_histograms(histogram, other):
+    histogram += other
+    return histogram
+
+def histogram_percentiles(histogram, edges, percentiles):
+    # Percentiles from the cumulative counts, interpolated linearly inside the bin that contains them
+    cumulative = np.cumsum(histogram, axis=0, dtype=np.uint32)
+    total = cumulative[-1]
+    results = {}
+    for percentile in percentiles:
+        target = total * (percentile / 100.0)
+        # First bin whose cumulative count reaches the target
+        index = np.minimum((cumulative < target[None]).sum(axis=0), len(edges) - 2)
+        below = np.where(index > 0, np.take_along_axis(cumulative, np.maximum(index - 1, 0)[None], axis=0)[0], 0)
+        in_bin = np.take_along_axis(histogram, index[None], axis=0)[0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = np.clip((target - below) / in_bin, 0, 1)
+        value = edges[index] + fraction * (edges[index + 1] - edges[index])
+        results[percentile] = np.where(total > 0, value, np.nan).astype(np.float32)
+    return results
+
+def percentile_names(statistics):
+    # MEDIAN and P<n> statistics (e.g. P90) computed from the histograms
+    percentiles = {}
+    for statistic in statistics:
+        if statistic == "MEDIAN":
+            percentiles[statistic] = 50.0
+        elif statistic.startswith("P") and statistic[1:].replace('.', '', 1).isdigit():
+            percentiles[statistic] = float(statistic[1:])
+    return percentiles
+
+def output_grid(first_file, extent=None):
+    # Grid of the outputs: the grid of the first raster, or the given extent (left, bottom, right, top) at its resolution
+    with rasterio.open(first_file) as src:
+        profile = src.profile
+        if extent is None:
+            return profile
+        left, bottom, right, top = extent
+        x_res, y_res = src.res
+    profile.update(transform=from_origin(left, top, x_res, y_res),
+                   width=int(math.ceil((right - left) / x_res)), height=int(math.ceil((top - bottom) / y_res)))
+    return profile
+
+def output_profile(first_file, extent=None):
+    # Float32 tiled GeoTIFF profile of the statistic rasters
+    profile = output_grid(first_file, extent)
+    profile.update(driver='GTiff', count=1, dtype=rasterio.float32, nodata=np.nan, tiled=True, blockxsize=256, blockysize=256)
+    return profile
+
+def set_null(data, statistic, set_null_zero=True):
+    # Set the zero cells to NoData (as SetNull "VALUE = 0"); the observation count keeps its zeros
+    if set_null_zero and statistic != "COUNT":
+        data[data == 0] = np.nan
+    return data
+
+def tile_windows(height, width, size=tile_size):
+    for row_off in range(0, height, size):
+        for col_off in range(0, width, size):
+            yield Window(col_off, row_off, min(size, width - col_off), min(size, height - row_off))
+
+def read_tile(src, bounds, shape):
+    # Read the part of a raster that covers the tile bounds; pixels outside the raster or NoData are NaN
+    window = from_bounds(*bounds, transform=src.transform).round_offsets().round_lengths()
+    data = src.read(1, window=window, out_shape=shape, boundless=True, fill_value=np.nan, out_dtype='float32')
+    if src.nodata is not None and not np.isnan(src.nodata):
+        data[data == src.nodata] = np.nan
+    return data
+
+def tile_bounds(transform, window):
+    left, top = transform * (window.col_off, window.row_off)
+    right, bottom = transform * (window.col_off + window.width, window.row_off + window.height)
+    return left, bottom, right, top
+
+def tile_statistics(tif_files, transform, window, percentiles=None, edges=None):
+    # Stream every scene through the accumulators (and histograms, when percentiles are requested) of one tile
+    shape = (window.height, window.width)
+    bounds = tile_bounds(transform, window)
+    acc = init_accumulator(shape)
+    histogram = init_histogram(shape, edges) if percentiles else None
+    for tif_file in tif_files:
+        with rasterio.open(tif_file) as src:
+            data = read_tile(src, bounds, shape)
+        update_accumulator(acc, data)
+        if percentiles:
+            update_histogram(histogram, data, edges)
+
+    statistics = finalize_accumulator(acc)
+    if percentiles:
+        values = histogram_percentiles(histogram, edges, percentiles.values())
+        statistics.update({statistic: values[percentile] for statistic, percentile in percentiles.items()})
+    return window, statistics
+
+def compute_cell_statistics(tif_files, output_paths, extent=None, set_null_zero=True, workers=max_workers, size=tile_size):
+    # output_paths maps each statistic (MEAN, MAXIMUM, MINIMUM, STD, COUNT, MEDIAN, P<n>) to its output raster
+    percentiles = percentile_names(output_paths)
+    edges = histogram_edges()
+    profile = output_profile(tif_files[0], extent)
+    transform = profile["transform"]
+
+    destinations = {}
+    try:
+        for statistic, output_path in output_paths.items():
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            destinations[statistic] = rasterio.open(output_path, 'w', **profile)
+
+        windows = list(tile_windows(profile["height"], profile["width"], size))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            count = len(windows)
+            results = executor.map(tile_statistics, [tif_files] * count, [transform] * count, windows,
+                                   [percentiles] * count, [edges] * count)
+            for window, statistics in results:
+                for statistic, dst in destinations.items():
+                    dst.write(set_null(statistics[statistic], statistic, set_null_zero), 1, window=window)
+    finally:
+        for dst in destinations.values():
+            dst.close()
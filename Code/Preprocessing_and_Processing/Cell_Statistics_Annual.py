@@ -1,57 +1,51 @@
-# -----------------------------Header information------------------------------
-# Author: Ali Reza Shahvaran
-# Filename: Cell_Statistics_Annual.py
-# License: CC BY 4.0
-# ----------------------------------------------------------------------------
-# Description: This script uses the ArcPy library to perform cell statistics operations on an annual basis. It sets environment settings for spatial references and extents, and processes raster data to generate annual statistics.
-# ----------------------------------------------------------------------------
-# Programming Language: Python 3.0
-# Libraries: arcpy, os
-# ----------------------------------------------------------------------------
-# Input: Processes raster data from specified input directories.
-# ----------------------------------------------------------------------------
-# Output: Generates annual cell statistics, saved in specified output directories.
-# ----------------------------------------------------------------------------
-
-import arcpy
-import os
-
-# Set the environment settings
-arcpy.env.outputCoordinateSystem = arcpy.SpatialReference(32617) 
-arcpy.env.extent = '579271.5 4774252.13214014 733018.5 4877647.86785986'
-
-# Base directories
-input_base_dir = r"E:\Thesis\Chapter_3\RS_Data\Chla_Outputs"
-output_base_dir = r"E:\Thesis\Chapter_3\RS_Data\Final_Maps_Annual"
-
-# Operations to perform
-operations = ["MEAN", "MAXIMUM", "STD"]
-
-for year in range(2013, 2024):
-    year_folder = os.path.join(input_base_dir, str(year))
-    output_folders = {
-        "MEAN": os.path.join(output_base_dir, "Annual_Avg"),
-        "MAXIMUM": os.path.join(output_base_dir, "Annual_Max"),
-        "STD": os.path.join(output_base_dir, "Annual_Std")
-    }
-
-    # List all TIFF files in the year folder
-    tif_files = [os.path.join(year_folder, f) for f in os.listdir(year_folder) if f.endswith('.tif')]
-
-    for op in operations:
-        out_raster = arcpy.sa.CellStatistics(
-            in_rasters_or_constants=tif_files,
-            statistics_type=op,
-            ignore_nodata="DATA",
-            process_as_multiband="SINGLE_BAND",
-            percentile_value=90,
-            percentile_interpolation_type="AUTO_DETECT"
-        )
-
-        # Set NoData value to None
-        out_raster = arcpy.sa.SetNull(out_raster, out_raster, "VALUE = 0")
-
-        # Save the output
-        output_path = os.path.join(output_folders[op], f"{year}.tif")
-        out_raster.save(output_path)
-
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: Cell_Statistics_Annual.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script performs cell statistics operations on an annual basis. It sets the output extent and processes raster data to generate annual statistics with the streaming engine in "Cell_Statistics.py", which reads every raster once for all statistics and does not need ArcGIS.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, Cell_Statistics
+# ----------------------------------------------------------------------------
+# Input: Processes raster data from specified input directories.
+# ----------------------------------------------------------------------------
+# Output: Generates annual cell statistics, saved in specified output directories.
+# ----------------------------------------------------------------------------
+
+import os
+
+import Cell_Statistics
+
+# Output extent (left, bottom, right, top) in WGS 84 / UTM zone 17N (EPSG:32617)
+extent = (579271.5, 4774252.13214014, 733018.5, 4877647.86785986)
+
+# Base directories
+input_base_dir = r"E:\Thesis\Chapter_3\RS_Data\Chla_Outputs"
+output_base_dir = r"E:\Thesis\Chapter_3\RS_Data\Final_Maps_Annual"
+
+# Operations to perform
+operations = ["MEAN", "MAXIMUM", "STD", "MEDIAN", "P90"]
+
+def main():
+    for year in range(2013, 2024):
+        year_folder = os.path.join(input_base_dir, str(year))
+        output_folders = {
+            "MEAN": os.path.join(output_base_dir, "Annual_Avg"),
+            "MAXIMUM": os.path.join(output_base_dir, "Annual_Max"),
+            "MINIMUM": os.path.join(output_base_dir, "Annual_Min"),
+            "STD": os.path.join(output_base_dir, "Annual_Std"),
+            "COUNT": os.path.join(output_base_dir, "Annual_Count"),
+            "MEDIAN": os.path.join(output_base_dir, "Annual_Median"),
+            "P90": os.path.join(output_base_dir, "Annual_P90")
+        }
+
+        # List all TIFF files in the year folder
+        tif_files = [os.path.join(year_folder, f) for f in os.listdir(year_folder) if f.endswith('.tif')]
+
+        # All operations are computed from a single read of the TIFF files
+        output_paths = {op: os.path.join(output_folders[op], f"{year}.tif") for op in operations}
+        Cell_Statistics.compute_cell_statistics(tif_files, output_paths, extent=extent)
+
+if __name__ == "__main__":
+    main()
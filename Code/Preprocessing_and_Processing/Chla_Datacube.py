@@ -0,0 +1,158 @@
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: Chla_Datacube.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script builds a Chl-a datacube (time x y x) from the "Band_Math.py" outputs. The cube is a chunked and compressed NetCDF4 file with a time coordinate parsed from the scene names, and new scenes are appended to it. Per-pixel time series and temporal reductions then read a few contiguous chunks instead of opening thousands of TIF files.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, datetime, numpy, pandas, rasterio, netCDF4, xarray, Cell_Statistics, Scene_Catalog
+# ----------------------------------------------------------------------------
+# Input: Chl-a TIF files in "Chla_Outputs/<year>/<scene>.tif".
+# ----------------------------------------------------------------------------
+# Output: The datacube "Chla_Datacube.nc".
+# ----------------------------------------------------------------------------
+
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import rasterio
+from rasterio.crs import CRS
+from rasterio.transform import Affine
+from rasterio.windows import Window
+import netCDF4
+import xarray as xr
+
+import Cell_Statistics
+import Scene_Catalog
+
+# Input and output paths
+input_base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs"
+cube_path = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Datacube.nc"
+
+# Chunk sizes (time, y, x); scenes are appended in groups of one time chunk
+chunk_sizes = (16, 256, 256)
+
+# zlib compression level (1-9)
+compression_level = 4
+
+time_units = "seconds since 1970-01-01 00:00:00"
+
+def scene_datetime(scene_name):
+    # Acquisition date and time from a scene name such as "L8_OLI_2013_06_22_15_59_31_017030_L2W"
+    parts = os.path.splitext(os.path.basename(scene_name))[0].split('_')
+    return datetime(*(int(part) for part in parts[2:8]))
+
+def find_scene_files(base_dir=input_base_dir):
+    # Chl-a TIF files sorted by acquisition time
+    return Scene_Catalog.find_scenes(base_dir, kind="tif")
+
+def create_cube(path, first_file, chunks=chunk_sizes, complevel=compression_level):
+    # The grid of the cube is the grid of the first scene
+    with rasterio.open(first_file) as src:
+        height, width = src.height, src.width
+        transform = src.transform
+        crs_wkt = src.crs.to_wkt()
+
+    with netCDF4.Dataset(path, 'w', format='NETCDF4') as ds:
+        ds.createDimension('time', None)
+        ds.createDimension('y', height)
+        ds.createDimension('x', width)
+
+        time = ds.createVariable('time', 'f8', ('time',))
+        time.units = time_units
+        time.calendar = "standard"
+        ds.createVariable('scene', str, ('time',))
+
+        # Pixel centre coordinates
+        x = ds.createVariable('x', 'f8', ('x',))
+        x[:] = transform.c + transform.a * (np.arange(width) + 0.5)
+        x.units = "m"
+        y = ds.createVariable('y', 'f8', ('y',))
+        y[:] = transform.f + transform.e * (np.arange(height) + 0.5)
+        y.units = "m"
+
+        # Georeferencing in the CF / GDAL conventions
+        spatial_ref = ds.createVariable('spatial_ref', 'i4')
+        spatial_ref.crs_wkt = crs_wkt
+        spatial_ref.spatial_ref = crs_wkt
+        spatial_ref.GeoTransform = " ".join(str(value) for value in transform.to_gdal())
+
+        chunks = (chunks[0], min(chunks[1], height), min(chunks[2], width))
+        chl_a = ds.createVariable('chl_a', 'f4', ('time', 'y', 'x'), zlib=True, complevel=complevel,
+                                  shuffle=True, chunksizes=chunks, fill_value=np.nan)
+        chl_a.units = "ug/L"
+        chl_a.grid_mapping = "spatial_ref"
+
+def cube_grid(ds):
+    # Transform and CRS of the cube
+    transform = Affine.from_gdal(*(float(value) for value in ds['spatial_ref'].GeoTransform.split()))
+    return transform, CRS.from_wkt(ds['spatial_ref'].crs_wkt)
+
+def append_scenes(tif_files, path=cube_path, chunks=chunk_sizes):
+    if not tif_files:
+        return 0
+    if not os.path.exists(path):
+        create_cube(path, tif_files[0], chunks)
+
+    with netCDF4.Dataset(path, 'a') as ds:
+        # Scene names are written last, so the slots of an interrupted append have none and are overwritten
+        scenes = [str(scene) for scene in ds['scene'][:]] if len(ds.dimensions['time']) else []
+        while scenes and not scenes[-1]:
+            scenes.pop()
+
+        # Scenes already in the cube are not appended again
+        new_files = [tif_file for tif_file in tif_files
+                     if os.path.splitext(os.path.basename(tif_file))[0] not in set(scenes)]
+        new_files.sort(key=scene_datetime)
+
+        chl_a = ds['chl_a']
+        height, width = len(ds.dimensions['y']), len(ds.dimensions['x'])
+        transform = cube_grid(ds)[0]
+        chunk_time, chunk_rows = chl_a.chunking()[0], chl_a.chunking()[1]
+
+        # Append one time chunk of scenes at a time, written one chunk row at a time
+        t0 = len(scenes)
+        for start in range(0, len(new_files), chunk_time):
+            group = new_files[start:start + chunk_time]
+            sources = [rasterio.open(tif_file) for tif_file in group]
+            try:
+                for row_off in range(0, height, chunk_rows):
+                    window = Window(0, row_off, width, min(chunk_rows, height - row_off))
+                    bounds = Cell_Statistics.tile_bounds(transform, window)
+                    shape = (window.height, window.width)
+                    block = np.stack([Cell_Statistics.read_tile(src, bounds, shape) for src in sources])
+                    chl_a[t0:t0 + len(group), row_off:row_off + window.height, :] = block
+            finally:
+                for src in sources:
+                    src.close()
+
+            for index, tif_file in enumerate(group):
+                scene = os.path.splitext(os.path.basename(tif_file))[0]
+                ds['time'][t0 + index] = netCDF4.date2num(scene_datetime(scene), time_units, "standard")
+                ds['scene'][t0 + index] = scene
+            ds.sync()
+            t0 += len(group)
+            print(f"{t0} scene(s) in the cube")
+
+    return len(new_files)
+
+def open_cube(path=cube_path):
+    # Lazily opened cube sorted by time (scenes appended later may be older than the last one in the file)
+    return xr.open_dataset(path).sortby('time')
+
+def pixel_time_series(row, col, path=cube_path):
+    # Chl-a time series of one pixel, read from the chunks that contain it
+    with netCDF4.Dataset(path, 'r') as ds:
+        times = netCDF4.num2date(ds['time'][:], time_units, "standard", only_use_cftime_datetimes=False)
+        values = np.asarray(ds['chl_a'][:, row, col], dtype=np.float32)
+    return pd.Series(values, index=pd.to_datetime([str(time) for time in times]), name="chl_a").sort_index()
+
+def main():
+    tif_files = find_scene_files(input_base_dir)
+    appended = append_scenes(tif_files, cube_path)
+    print(f"Appended {appended} new scene(s) to {cube_path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,110 @@
-# -----------------------------Header information------------------------------
-# Author: Ali Reza Shahvaran
-# Filename: Clip.py
-# License: CC BY 4.0
-# ----------------------------------------------------------------------------
-# Description: This script uses the ArcPy library to clip raster data using specified shapefiles. It sets the ArcGIS Pro workspace and defines paths for shapefiles used for clipping.
-# ----------------------------------------------------------------------------
-# Programming Language: Python 3.0
-# Libraries: arcpy, os
-# ----------------------------------------------------------------------------
-# Input: Uses raster data and shapefiles from specified paths.
-# ----------------------------------------------------------------------------
-# Output: The script likely outputs clipped raster data (details not specified in the initial part of the code).
-# ----------------------------------------------------------------------------
-
-import arcpy
-import os
-
-# Set the workspace (change this to your ArcGIS Pro environment path)
-arcpy.env.workspace = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs"
-
-# Shapefile paths
-shapefiles = {
-    "WLON": "C:\\Users\\PHYS3009\\Desktop\\Chapter3\\Clip\\WLON_Shapefile\\WLON.shp"
-}
-    #"HH": "C:\\Users\\PHYS3009\\Desktop\\Chapter3\\Clip\\HH_Shapefile\\HH.shp",
-    #"WLOO": "C:\\Users\\PHYS3009\\Desktop\\Chapter3\\Clip\\WLOO_Shapefile\\WLOO.shp",
-    #"WLON": "C:\\Users\\PHYS3009\\Desktop\\Chapter3\\Clip\\WLON_Shapefile\\WLON.shp"
-
-
-# Output directories
-output_dirs = {
-    "WLON": "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLON"
-}
-
-    #"HH": "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_HH",
-    #"WLOO": "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLOO",
-    #"WLON": "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLON"
-
-
-# Debugging - Check if workspace is correct
-print(f"Workspace: {arcpy.env.workspace}")
-print(f"Directories in workspace: {os.listdir(arcpy.env.workspace)}")
-
-# Iterate through each subfolder
-for year_folder in os.listdir(arcpy.env.workspace):
-    year_path = os.path.join(arcpy.env.workspace, year_folder)
-    if os.path.isdir(year_path):
-        print(f"Processing directory: {year_path}")
-
-        # Process each TIFF file in the subfolder using os.listdir
-        for tiff_file in os.listdir(year_path):
-            if tiff_file.lower().endswith(".tif"):
-                tiff_path = os.path.join(year_path, tiff_file)
-                print(f"Processing TIFF file: {tiff_path}")
-
-                for key, shapefile in shapefiles.items():
-                    try:
-                        # Create output folder for the year if it doesn't exist
-                        output_year_folder = os.path.join(output_dirs[key], year_folder)
-                        if not os.path.exists(output_year_folder):
-                            os.makedirs(output_year_folder)
-                            print(f"Created folder: {output_year_folder}")
-
-                        # Set output file path
-                        output_file = os.path.join(output_year_folder, os.path.splitext(tiff_file)[0] + f"_{key}.tif")
-
-                        # Execute clipping
-                        arcpy.management.Clip(tiff_path, "", output_file, shapefile, "0", "ClippingGeometry", "NO_MAINTAIN_EXTENT")
-                        print(f"Output saved to: {output_file}")
-                    except Exception as e:
-                        print(f"Error processing {tiff_path} with {shapefile}: {e}")
-
-print("Processing complete.")
\ No newline at end of file
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: Clip.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script clips raster data using specified shapefiles, without ArcGIS. Each shapefile is rasterized once to the common grid of the scenes (see "ROI_Masks.py"), so clipping a scene is a windowed read of the ROI bounding box multiplied by the ROI mask. Scenes are clipped in parallel.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, numpy, rasterio, concurrent.futures
+# ----------------------------------------------------------------------------
+# Input: Uses raster data and shapefiles from specified paths.
+# ----------------------------------------------------------------------------
+# Output: Clipped rasters (one per scene and shapefile) saved in the output directory of each shapefile.
+# ----------------------------------------------------------------------------
+
+import os
+import numpy as np
+import rasterio
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ROI_Masks
+
+# Set the workspace (folder with one subfolder of Chl-a rasters per year)
+workspace = "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs"
+
+# Shapefile paths
+shapefiles = ROI_Masks.roi_shapefiles
+
+# Output directories
+output_dirs = {
+    "HH": "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_HH",
+    "WLOO": "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLOO",
+    "WLON": "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs_WLON"
+}
+
+# Value of the pixels outside the clipping geometry (as the "0" NoData value passed to arcpy Clip)
+nodata_value = 0
+
+# Number of scenes clipped at the same time (None uses all available cores)
+max_workers = None
+
+def clip_tiff(tiff_path, year_folder):
+    outputs = []
+    with rasterio.open(tiff_path) as src:
+        for key, shapefile in shapefiles.items():
+            # Skip the ROIs the scene does not overlap (their bounding window is empty)
+            window, mask = ROI_Masks.roi_window_mask(key, shapefile, src.crs, src.transform, src.shape)
+            if window.width == 0 or window.height == 0:
+                print(f"Skipping {key} for {os.path.basename(tiff_path)}: the ROI does not overlap the raster")
+                continue
+
+            # Create output folder for the year if it doesn't exist
+            output_year_folder = os.path.join(output_dirs[key], year_folder)
+            os.makedirs(output_year_folder, exist_ok=True)
+
+            # Set output file path
+            tiff_file = os.path.basename(tiff_path)
+            output_file = os.path.join(output_year_folder, os.path.splitext(tiff_file)[0] + f"_{key}.tif")
+
+            # Read only the bounding window of the ROI and blank the pixels outside the clipping geometry
+            data = src.read(1, window=window)
+            data = np.where(mask, data, nodata_value).astype(data.dtype)
+
+            # The output covers the ROI extent only (as "NO_MAINTAIN_EXTENT")
+            profile = src.profile
+            profile.update(width=window.width, height=window.height, transform=src.window_transform(window),
+                           nodata=nodata_value, tiled=False)
+            profile.pop("blockxsize", None)
+            profile.pop("blockysize", None)
+            with rasterio.open(output_file, 'w', **profile) as dst:
+                dst.write(data, 1)
+            outputs.append(output_file)
+    return outputs
+
+def find_tiff_files(workspace_dir):
+    # Process each TIFF file in the year subfolders
+    tiff_files = []
+    for year_folder in os.listdir(workspace_dir):
+        year_path = os.path.join(workspace_dir, year_folder)
+        if os.path.isdir(year_path):
+            for tiff_file in os.listdir(year_path):
+                if tiff_file.lower().endswith(".tif"):
+                    tiff_files.append((os.path.join(year_path, tiff_file), year_folder))
+    return tiff_files
+
+def main():
+    print(f"Workspace: {workspace}")
+    tiff_files = find_tiff_files(workspace)
+    print(f"Found {len(tiff_files)} TIFF files")
+    if not tiff_files:
+        return
+
+    # Rasterize the shapefiles once on the grid of the first scene; the workers then load the cached masks
+    with rasterio.open(tiff_files[0][0]) as src:
+        for key, shapefile in shapefiles.items():
+            ROI_Masks.roi_window_mask(key, shapefile, src.crs, src.transform, src.shape)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(clip_tiff, tiff_path, year_folder): tiff_path for tiff_path, year_folder in tiff_files}
+        for future in as_completed(futures):
+            try:
+                for output_file in future.result():
+                    print(f"Output saved to: {output_file}")
+            except Exception as e:
+                print(f"Error processing {futures[future]}: {e}")
+
+    print("Processing complete.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: QA_Masks.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script decodes the Landsat 8/9 Collection 2 QA_PIXEL band with bitwise shifts and masks applied to whole arrays (or windows of them), instead of formatting every code as a binary string. It gives the boolean flags (fill, dilated cloud, cirrus, cloud, cloud shadow, snow, clear and water) and the 2-bit confidences (cloud, cloud shadow, snow/ice and cirrus), and writes per-scene usable-pixel masks that downstream masking can apply directly: a pixel is masked when any of the cloud flags is set or any confidence reaches its threshold.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, numpy, rasterio, concurrent.futures, Scene_Catalog
+# ----------------------------------------------------------------------------
+# Input: QA_PIXEL TIF files of the Level-1 scenes.
+# ----------------------------------------------------------------------------
+# Output: One mask raster per scene ("<scene>_QA_MASK.tif", uint8: 1 usable, 0 masked, 255 fill) in "QA_Masks/<year>".
+# ----------------------------------------------------------------------------
+
+import os
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+from concurrent.futures import ProcessPoolExecutor
+
+import Scene_Catalog
+
+# Level-1 scenes and output folder of the mask rasters (one subfolder per year)
+input_base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Level_1"
+output_base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\QA_Masks"
+
+# Number of rows decoded at once
+window_rows = 1024
+
+# Number of scenes processed at the same time (None uses all available cores)
+max_workers = None
+
+# Bit of each QA_PIXEL flag
+qa_flags = {
+    "Fill": 0,
+    "Dilated_Cloud": 1,
+    "Cirrus": 2,
+    "Cloud": 3,
+    "Cloud_Shadow": 4,
+    "Snow": 5,
+    "Clear": 6,
+    "Water": 7,
+}
+
+# First bit of each 2-bit QA_PIXEL confidence (0 none, 1 low, 2 medium/reserved, 3 high)
+qa_confidences = {
+    "Cloud_Confidence": 8,
+    "Cloud_Shadow_Confidence": 10,
+    "Snow_Ice_Confidence": 12,
+    "Cirrus_Confidence": 14,
+}
+
+# Flags that make a pixel unusable for water quality retrievals
+cloud_flags = ["Fill", "Dilated_Cloud", "Cirrus", "Cloud", "Cloud_Shadow", "Snow"]
+
+# Lowest confidence (1 low, 2 medium, 3 high) at which a pixel is masked as well (None ignores the confidence)
+confidence_thresholds = {
+    "Cloud_Confidence": 2,
+    "Cloud_Shadow_Confidence": 3,
+    "Snow_Ice_Confidence": 3,
+    "Cirrus_Confidence": 3,
+}
+
+# Values of the mask rasters
+usable_value = 1
+masked_value = 0
+fill_value = 255
+
+def decode_flags(qa, names=qa_flags):
+    # Boolean layer of every flag
+    qa = np.asarray(qa, dtype=np.uint16)
+    return {name: ((qa >> qa_flags[name]) & 1).astype(bool) for name in names}
+
+def decode_confidences(qa, names=qa_confidences):
+    # Confidence level (0 to 3) of every 2-bit field
+    qa = np.asarray(qa, dtype=np.uint16)
+    return {name: ((qa >> qa_confidences[name]) & 3).astype(np.uint8) for name in names}
+
+def flag_mask(qa, names=cloud_flags):
+    # True where any of the flags is set, with a single bitwise AND
+    bits = sum(1 << qa_flags[name] for name in names)
+    return (np.asarray(qa, dtype=np.uint16) & bits) != 0
+
+def usable_mask(qa, names=cloud_flags, thresholds=confidence_thresholds):
+    # 1 where the pixel can be used, 0 where a flag or a confidence masks it, 255 for fill pixels
+    qa = np.asarray(qa, dtype=np.uint16)
+    masked = flag_mask(qa, names)
+    for name, level in decode_confidences(qa, [name for name, threshold in thresholds.items() if threshold]).items():
+        masked |= level >= thresholds[name]
+    mask = np.where(masked, masked_value, usable_value).astype(np.uint8)
+    mask[decode_flags(qa, ["Fill"])["Fill"]] = fill_value
+    return mask
+
+def qa_file_path(scene_folder):
+    scene = os.path.basename(scene_folder)
+    return os.path.join(scene_folder, f"{scene}_QA_PIXEL.TIF")
+
+def mask_file_path(scene_folder, base_dir=output_base_dir):
+    scene = os.path.basename(scene_folder)
+    year = Scene_Catalog.parse_scene_name(scene)["acquired"].year
+    return os.path.join(base_dir, str(year), f"{scene}_QA_MASK.tif")
+
+def write_mask_raster(qa_path, output_path, rows=window_rows):
+    # Decode the QA band window by window into a usable-pixel mask (uint8, fill pixels as NoData)
+    with rasterio.open(qa_path) as src:
+        profile = src.profile
+        profile.update(driver='GTiff', count=1, dtype=rasterio.uint8, nodata=fill_value, tiled=True,
+                       blockxsize=256, blockysize=256, compress='deflate')
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        # Write to a temporary file first so an interrupted run never leaves a partial mask raster
+        tmp_path = output_path + ".tmp"
+        with rasterio.open(tmp_path, 'w', **profile) as dst:
+            dst.set_band_description(1, f"QA usable pixels ({usable_value} usable, {masked_value} masked, {fill_value} fill)")
+            dst.update_tags(1, masked_flags=",".join(cloud_flags),
+                            **{name: f"masked from {threshold}" for name, threshold in confidence_thresholds.items() if threshold})
+            for row_off in range(0, src.height, rows):
+                window = Window(0, row_off, src.width, min(rows, src.height - row_off))
+                dst.write(usable_mask(src.read(1, window=window)), 1, window=window)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def process_scene(scene_folder, base_dir=output_base_dir):
+    try:
+        return write_mask_raster(qa_file_path(scene_folder), mask_file_path(scene_folder, base_dir))
+    except Exception as e:
+        print(f"Error processing {scene_folder}: {e}")
+        return None
+
+def main():
+    # Level-1 scene folders from the scene catalog; scenes that already have a mask raster are skipped
+    scene_folders = [folder for folder in Scene_Catalog.find_scenes(input_base_dir, kind="dir")
+                     if not os.path.exists(mask_file_path(folder))]
+    print(f"{len(scene_folders)} scene(s) to process")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for scene_folder, output_path in zip(scene_folders, executor.map(process_scene, scene_folders)):
+            if output_path:
+                print(f"Processed {os.path.basename(scene_folder)}")
+
+if __name__ == "__main__":
+    main()
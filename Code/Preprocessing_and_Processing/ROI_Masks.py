@@ -0,0 +1,99 @@
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: ROI_Masks.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script rasterizes the region of interest (ROI) shapefiles (HH, WLOO and WLON) to the grid of a raster. Each ROI becomes a boolean mask in which a pixel is inside the ROI when its centre falls within the polygons, as with the ArcGIS "ClippingGeometry" option. The mask of each ROI is cropped to its bounding window and cached on disk, so a grid shared by many scenes is only rasterized once.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, hashlib, geopandas, rasterio, numpy
+# ----------------------------------------------------------------------------
+# Input: ROI shapefiles and the grid (CRS, transform and shape) of a raster.
+# ----------------------------------------------------------------------------
+# Output: One boolean mask per ROI on the raster grid, and the cached masks (.npz) with their bounding windows.
+# ----------------------------------------------------------------------------
+
+import os
+import hashlib
+import geopandas as gpd
+from rasterio.features import rasterize
+from rasterio.windows import Window
+import numpy as np
+
+# ROI shapefile paths
+roi_shapefiles = {
+    "HH": "C:\\Users\\PHYS3009\\Desktop\\Chapter3\\Clip\\HH_Shapefile\\HH.shp",
+    "WLOO": "C:\\Users\\PHYS3009\\Desktop\\Chapter3\\Clip\\WLOO_Shapefile\\WLOO.shp",
+    "WLON": "C:\\Users\\PHYS3009\\Desktop\\Chapter3\\Clip\\WLON_Shapefile\\WLON.shp"
+}
+
+# Folder of the cached ROI masks (cropped to their bounding windows)
+mask_cache_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\ROI_Masks"
+
+# Masks already rasterized or loaded in this process, keyed by ROI and grid
+mask_cache = {}
+window_cache = {}
+
+def grid_key(crs, transform, shape):
+    return (str(crs), transform.to_gdal(), tuple(shape))
+
+def rasterize_roi(shapefile_path, crs, transform, shape):
+    # Reproject the ROI polygons to the raster CRS and burn them into the raster grid
+    roi = gpd.read_file(shapefile_path).to_crs(crs)
+    mask = rasterize(((geometry, 1) for geometry in roi.geometry), out_shape=shape,
+                     transform=transform, fill=0, dtype='uint8')
+    return mask.astype(bool)
+
+def roi_masks(crs, transform, shape, shapefiles=roi_shapefiles):
+    # Rasterize each ROI once per grid; later calls with the same grid reuse the masks
+    masks = {}
+    for key, shapefile_path in shapefiles.items():
+        cache_key = (key, shapefile_path) + grid_key(crs, transform, shape)
+        if cache_key not in mask_cache:
+            mask_cache[cache_key] = rasterize_roi(shapefile_path, crs, transform, shape)
+        masks[key] = mask_cache[cache_key]
+    return masks
+
+def roi_area_km2(mask, pixel_area_km2=0.0009):
+    # Area of the ROI on the raster grid (30 m pixels by default)
+    return np.count_nonzero(mask) * pixel_area_km2
+
+def bounding_window(mask):
+    # Smallest window that contains every pixel of the ROI (an empty window when the ROI does not overlap the raster)
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0:
+        return Window(0, 0, 0, 0)
+    return Window(int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1))
+
+def cache_file_path(key, shapefile_path, crs, transform, shape, cache_dir):
+    # The cache file name depends on the ROI, the shapefile version and the grid
+    modified = os.path.getmtime(shapefile_path) if os.path.exists(shapefile_path) else 0
+    digest = hashlib.sha1(repr((key, shapefile_path, modified) + grid_key(crs, transform, shape)).encode()).hexdigest()
+    return os.path.join(cache_dir, f"{key}_{digest[:16]}.npz")
+
+def roi_window_mask(key, shapefile_path, crs, transform, shape, cache_dir=mask_cache_dir):
+    # Bounding window of the ROI and its mask cropped to that window, from memory, disk or a new rasterization
+    cache_key = (key, shapefile_path) + grid_key(crs, transform, shape)
+    if cache_key in window_cache:
+        return window_cache[cache_key]
+
+    cache_file = cache_file_path(key, shapefile_path, crs, transform, shape, cache_dir) if cache_dir else None
+    if cache_file and os.path.exists(cache_file):
+        with np.load(cache_file) as cached:
+            col_off, row_off, width, height = (int(value) for value in cached["window"])
+            window, window_mask = Window(col_off, row_off, width, height), cached["mask"]
+    else:
+        mask = rasterize_roi(shapefile_path, crs, transform, shape)
+        window = bounding_window(mask)
+        window_mask = mask[window.row_off:window.row_off + window.height, window.col_off:window.col_off + window.width]
+        if cache_file:
+            # Write to a temporary file first so parallel workers never read a partly written cache file
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = cache_file + f".{os.getpid()}.tmp.npz"
+            np.savez_compressed(tmp_file, mask=window_mask,
+                                window=np.array([window.col_off, window.row_off, window.width, window.height]))
+            os.replace(tmp_file, cache_file)
+
+    window_cache[cache_key] = (window, window_mask)
+    return window, window_mask
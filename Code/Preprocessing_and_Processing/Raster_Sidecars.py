@@ -0,0 +1,138 @@
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: Raster_Sidecars.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script computes a small statistics summary of every raster written by "ACOLITE_NCtoTIF.py", "Band_Math.py" and "ACOLITE_NCtoChla.py" while it is written, and saves it next to the raster as a JSON sidecar ("<raster>.stats.json"). For every band the sidecar holds the number of valid pixels, the minimum, maximum and mean, a fixed-bin histogram and the coverage of each ROI, so coverage and summary figures read the sidecars instead of the rasters.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, json, fnmatch, numpy, ROI_Masks, Scene_Catalog
+# ----------------------------------------------------------------------------
+# Input: The blocks of a raster as they are written, with its grid (CRS, transform and shape).
+# ----------------------------------------------------------------------------
+# Output: One JSON sidecar per raster.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+import fnmatch
+import numpy as np
+
+import ROI_Masks
+import Scene_Catalog
+
+# Sidecar file name: the raster name with this suffix instead of ".tif"
+sidecar_suffix = ".stats.json"
+
+# Histogram ranges by band name (first match); values below or above the range are counted in the first or last bin
+histogram_ranges = {
+    "rhow_*": (0.0, 0.1),
+    "nd_*": (-1.0, 1.0),
+    "ratio_*": (0.0, 5.0),
+    "*": (0.0, 30.0),
+}
+histogram_bins = 60
+
+# ROIs whose coverage is recorded (None skips the coverage)
+sidecar_rois = ROI_Masks.roi_shapefiles
+
+# Area of one pixel (30 m)
+pixel_area_km2 = 0.0009
+
+def sidecar_path(tif_path):
+    return os.path.splitext(tif_path)[0] + sidecar_suffix
+
+def histogram_range(band):
+    return next(value_range for pattern, value_range in histogram_ranges.items() if fnmatch.fnmatch(band, pattern))
+
+def init_band(band):
+    return {"count": 0, "sum": 0.0, "min": np.inf, "max": -np.inf,
+            "range": histogram_range(band), "histogram": np.zeros(histogram_bins, dtype=np.int64), "roi_valid": {}}
+
+def init_sidecar(tif_path, crs, transform, shape, bands, rois=sidecar_rois):
+    # Running statistics of a raster; the ROI masks come from the ROI_Masks cache (rasterized once per grid)
+    sidecar = {"tif_path": tif_path, "shape": tuple(shape), "bands": {band: init_band(band) for band in bands}, "rois": {}}
+    for key, shapefile_path in (rois or {}).items():
+        try:
+            sidecar["rois"][key] = ROI_Masks.roi_window_mask(key, shapefile_path, crs, transform, shape)
+        except Exception as e:
+            print(f"ROI {key} not available for {tif_path}, Error: {e}")
+    return sidecar
+
+def update_sidecar(sidecar, band, data, row_off=0, col_off=0):
+    # Add one block of a band, written at (row_off, col_off)
+    stats = sidecar["bands"][band]
+    valid = np.isfinite(data)
+    values = data[valid]
+    if values.size:
+        stats["count"] += int(values.size)
+        stats["sum"] += float(values.sum(dtype=np.float64))
+        stats["min"] = min(stats["min"], float(values.min()))
+        stats["max"] = max(stats["max"], float(values.max()))
+        low, high = stats["range"]
+        bins = np.floor((values - low) / ((high - low) / histogram_bins)).astype(np.intp)
+        np.clip(bins, 0, histogram_bins - 1, out=bins)
+        stats["histogram"] += np.bincount(bins, minlength=histogram_bins)
+
+    # Valid pixels of the block inside each ROI (the overlap of the block and the ROI window)
+    for key, (window, mask) in sidecar["rois"].items():
+        top, left = max(row_off, window.row_off), max(col_off, window.col_off)
+        bottom = min(row_off + data.shape[0], window.row_off + window.height)
+        right = min(col_off + data.shape[1], window.col_off + window.width)
+        if top >= bottom or left >= right:
+            continue
+        block_valid = valid[top - row_off:bottom - row_off, left - col_off:right - col_off]
+        roi_mask = mask[top - window.row_off:bottom - window.row_off, left - window.col_off:right - window.col_off]
+        stats["roi_valid"][key] = stats["roi_valid"].get(key, 0) + int(np.count_nonzero(block_valid & roi_mask))
+
+def summarize_band(stats, rois):
+    observed = stats["count"] > 0
+    summary = {
+        "count": stats["count"],
+        "covered_km2": stats["count"] * pixel_area_km2,
+        "min": stats["min"] if observed else None,
+        "max": stats["max"] if observed else None,
+        "mean": stats["sum"] / stats["count"] if observed else None,
+        "histogram": {"range": list(stats["range"]), "counts": stats["histogram"].tolist()},
+        "roi_coverage": {},
+    }
+    for key, (window, mask) in rois.items():
+        roi_pixels = int(np.count_nonzero(mask))
+        valid_pixels = stats["roi_valid"].get(key, 0)
+        summary["roi_coverage"][key] = {"valid_pixels": valid_pixels, "roi_pixels": roi_pixels,
+                                        "covered_km2": valid_pixels * pixel_area_km2,
+                                        "percent": 100.0 * valid_pixels / roi_pixels if roi_pixels else None}
+    return summary
+
+def scene_info(tif_path):
+    # Scene name and acquisition time from the raster name or, for the per-band rasters, from its L2W folder
+    for name in (os.path.basename(tif_path), os.path.basename(os.path.dirname(tif_path))):
+        scene = Scene_Catalog.parse_scene_name(name)
+        if scene:
+            return os.path.splitext(name)[0], scene["acquired"].isoformat()
+    return None, None
+
+def write_sidecar(sidecar):
+    tif_path = sidecar["tif_path"]
+    scene, acquired = scene_info(tif_path)
+    summary = {
+        "file": os.path.basename(tif_path),
+        "scene": scene,
+        "acquired": acquired,
+        "shape": list(sidecar["shape"]),
+        "bands": {band: summarize_band(stats, sidecar["rois"]) for band, stats in sidecar["bands"].items()},
+    }
+    # Write to a temporary file first so an interrupted write never leaves a broken sidecar
+    path = sidecar_path(tif_path)
+    with open(path + ".tmp", 'w') as file:
+        json.dump(summary, file, indent=1)
+    os.replace(path + ".tmp", path)
+    return path
+
+def read_sidecar(tif_path):
+    # Summary of a raster, or None when it has no sidecar
+    path = sidecar_path(tif_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        return json.load(file)
@@ -0,0 +1,184 @@
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: Scene_Catalog.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script keeps a SQLite catalog of the scenes on the data drive (Level-1 folders, ACOLITE .nc files and L2W folders, Chl-a rasters). The folders are crawled in parallel with os.scandir and only the folders whose modification time changed since the last crawl are listed again, so a refresh of an unchanged archive is a few thousand stat calls. Every scene is indexed by sensor, path/row, acquisition time and product level, and the other scripts query the catalog (scenes of a year, a month or an image ID) instead of walking the folders themselves.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, re, sqlite3, datetime, concurrent.futures
+# ----------------------------------------------------------------------------
+# Input: The root folders of the scenes (e.g. "Level_1", "ACOLITE_Outputs" and "Chla_Outputs").
+# ----------------------------------------------------------------------------
+# Output: The catalog database "scene_catalog.sqlite".
+# ----------------------------------------------------------------------------
+
+import os
+import re
+import sqlite3
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Catalog database
+catalog_path = "E:\\Thesis\\Chapter_3\\RS_Data\\scene_catalog.sqlite"
+
+# Root folders crawled by main()
+catalog_roots = [
+    "E:\\Thesis\\Chapter_3\\RS_Data\\Level_1",
+    "E:\\Thesis\\Chapter_3\\RS_Data\\ACOLITE_Outputs",
+    "E:\\Thesis\\Chapter_3\\RS_Data\\Chla_Outputs",
+]
+
+# Number of folders listed at the same time (the crawl waits on the drive, not on the CPU)
+max_workers = 8
+
+# Level-1 product IDs, e.g. "LC08_L1TP_018030_20130405_20200912_02_T1"
+level1_pattern = re.compile(r"LC0([89])_(L1\w\w)_(\d{6})_(\d{8})_\d{8}_\d{2}_\w\w")
+
+# ACOLITE scene names, e.g. "L8_OLI_2013_06_22_15_59_31_017030_L2W"
+acolite_pattern = re.compile(r"L([89])_OLI_(\d{4}_\d{2}_\d{2}_\d{2}_\d{2}_\d{2})_(\d{6})_(L\d\w)")
+
+def parse_scene_name(name):
+    # Sensor, path/row, acquisition time and product level of a scene folder or file name (None if it is not a scene)
+    stem = os.path.splitext(name)[0]
+    match = level1_pattern.fullmatch(stem)
+    if match:
+        sensor, level, path_row, date = match.groups()
+        return {"sensor": f"L{sensor}", "path_row": path_row, "acquired": datetime.strptime(date, '%Y%m%d'), "level": level}
+    match = acolite_pattern.fullmatch(stem)
+    if match:
+        sensor, acquired, path_row, level = match.groups()
+        return {"sensor": f"L{sensor}", "path_row": path_row,
+                "acquired": datetime.strptime(acquired, '%Y_%m_%d_%H_%M_%S'), "level": level}
+    return None
+
+def connect(path=catalog_path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.executescript("""
+        CREATE TABLE IF NOT EXISTS folders (
+            path TEXT PRIMARY KEY, parent TEXT, mtime REAL);
+        CREATE TABLE IF NOT EXISTS scenes (
+            path TEXT PRIMARY KEY, folder TEXT, name TEXT, kind TEXT,
+            sensor TEXT, path_row TEXT, acquired TEXT, year INTEGER, month INTEGER, level TEXT);
+        CREATE INDEX IF NOT EXISTS folders_parent ON folders (parent);
+        CREATE INDEX IF NOT EXISTS scenes_folder ON scenes (folder);
+        CREATE INDEX IF NOT EXISTS scenes_date ON scenes (year, month);
+        CREATE INDEX IF NOT EXISTS scenes_id ON scenes (sensor, path_row, acquired);
+    """)
+    return connection
+
+def normalize(path):
+    return os.path.normpath(os.path.abspath(path))
+
+def scan_folder(path, known_mtime):
+    # List a folder only if it changed since the last crawl; returns its sub-folders and, if listed, its scenes
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return path, None, None, None
+    if mtime == known_mtime:
+        return path, mtime, None, None
+
+    sub_folders, scenes = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            is_dir = entry.is_dir()
+            if is_dir:
+                sub_folders.append(entry.path)
+            scene = parse_scene_name(entry.name)
+            if scene:
+                kind = "dir" if is_dir else os.path.splitext(entry.name)[1].lower().lstrip('.')
+                scenes.append((entry.path, path, entry.name, kind, scene["sensor"], scene["path_row"],
+                               scene["acquired"].isoformat(), scene["acquired"].year, scene["acquired"].month, scene["level"]))
+    return path, mtime, sub_folders, scenes
+
+def refresh(roots, path=catalog_path, workers=max_workers):
+    # Crawl the roots level by level; unchanged folders reuse the sub-folders stored in the catalog
+    connection = connect(path)
+    known = {folder: mtime for folder, mtime in connection.execute("SELECT path, mtime FROM folders")}
+    children = {}
+    for folder, parent in connection.execute("SELECT path, parent FROM folders"):
+        children.setdefault(parent, []).append(folder)
+
+    roots = [normalize(root) for root in roots]
+    visited, listed = set(), 0
+    with connection, ThreadPoolExecutor(max_workers=workers) as executor:
+        level = roots
+        while level:
+            next_level = []
+            for folder, mtime, sub_folders, scenes in executor.map(scan_folder, level, [known.get(folder) for folder in level]):
+                if mtime is None:
+                    # The folder no longer exists
+                    if folder in known:
+                        remove_folder(connection, folder)
+                    continue
+                visited.add(folder)
+                if sub_folders is None:
+                    next_level.extend(children.get(folder, []))
+                    continue
+
+                # The folder changed: replace its scenes and sub-folders
+                listed += 1
+                connection.execute("DELETE FROM scenes WHERE folder = ?", (folder,))
+                connection.executemany("INSERT OR REPLACE INTO scenes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", scenes)
+                connection.execute("INSERT OR REPLACE INTO folders VALUES (?, ?, ?)",
+                                   (folder, os.path.dirname(folder), mtime))
+                for sub_folder in set(children.get(folder, [])) - set(sub_folders):
+                    # Sub-folders that were deleted are removed with everything below them
+                    remove_folder(connection, sub_folder)
+                for sub_folder in sub_folders:
+                    connection.execute("INSERT OR IGNORE INTO folders VALUES (?, ?, NULL)", (sub_folder, folder))
+                next_level.extend(sub_folders)
+            level = next_level
+    connection.close()
+    print(f"Catalog refreshed: {len(visited)} folder(s) checked, {listed} listed")
+
+def remove_folder(connection, folder):
+    prefix = folder + os.sep
+    connection.execute("DELETE FROM scenes WHERE folder = ? OR substr(folder, 1, ?) = ?", (folder, len(prefix), prefix))
+    connection.execute("DELETE FROM folders WHERE path = ? OR substr(path, 1, ?) = ?", (folder, len(prefix), prefix))
+
+def query(root=None, path=catalog_path, **filters):
+    # Paths of the catalogued scenes below root, sorted by acquisition time
+    # filters: any of kind, sensor, path_row, level, year, month, acquired, name, or date ("YYYY-MM-DD")
+    conditions, values = [], []
+    if root:
+        prefix = normalize(root) + os.sep
+        conditions.append("substr(path, 1, ?) = ?")
+        values.extend([len(prefix), prefix])
+    for column, value in filters.items():
+        if value is not None:
+            conditions.append("substr(acquired, 1, 10) = ?" if column == "date" else f"{column} = ?")
+            values.append(value)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    connection = connect(path)
+    try:
+        return [row[0] for row in connection.execute(f"SELECT path FROM scenes{where} ORDER BY acquired, path", values)]
+    finally:
+        connection.close()
+
+def find_scenes(root, path=catalog_path, **filters):
+    # Refresh the catalog below root, then query it (what the other scripts call instead of os.walk)
+    refresh([root], path)
+    return query(root, path, **filters)
+
+def scenes_for_year(year, root=None, path=catalog_path, **filters):
+    return query(root, path, year=year, **filters)
+
+def scenes_for_month(year, month, root=None, path=catalog_path, **filters):
+    return query(root, path, year=year, month=month, **filters)
+
+def scenes_for_image(image_id, root=None, path=catalog_path, **filters):
+    # Scenes acquired on the same day by the same sensor over the same path/row as a Level-1 product ID or ACOLITE scene name
+    scene = parse_scene_name(image_id)
+    if scene is None:
+        return []
+    return query(root, path, sensor=scene["sensor"], path_row=scene["path_row"],
+                 date=scene["acquired"].date().isoformat(), **filters)
+
+def main():
+    refresh(catalog_roots)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: Scene_Prefilter.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script screens the Level-1 scenes before any heavy processing. For every scene, only the part of the QA_PIXEL band that covers each ROI is read and decoded (see "QA_Masks.py"), giving the data coverage and the cloud, cloud shadow and water fractions inside the ROI. The fractions are kept in a catalog (CSV), and a scene is accepted when at least one of the decision ROIs passes the thresholds; the decision is recomputed from the stored fractions with the current thresholds, so changing them needs no new screening. "Band_Math.py", "ACOLITE_NCtoChla.py" and the ACOLITE batch driver use these decisions to skip the rejected scenes.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, pandas, numpy, rasterio, concurrent.futures, QA_Masks, ROI_Masks, Scene_Catalog
+# ----------------------------------------------------------------------------
+# Input: QA_PIXEL TIF files of the Level-1 scenes and the ROI shapefiles listed in "ROI_Masks.py".
+# ----------------------------------------------------------------------------
+# Output: The pre-filter catalog "scene_prefilter.csv" (one row per scene).
+# ----------------------------------------------------------------------------
+
+import os
+import pandas as pd
+import numpy as np
+import rasterio
+from concurrent.futures import ProcessPoolExecutor
+
+import QA_Masks
+import ROI_Masks
+import Scene_Catalog
+
+# Level-1 scenes and pre-filter catalog
+input_base_dir = "E:\\Thesis\\Chapter_3\\RS_Data\\Level_1"
+prefilter_path = "E:\\Thesis\\Chapter_3\\RS_Data\\scene_prefilter.csv"
+
+# ROIs screened for every scene, and the ROIs of which at least one has to pass for the scene to be accepted
+prefilter_rois = ROI_Masks.roi_shapefiles
+decision_rois = ["HH", "WLOO", "WLON"]
+
+# Thresholds (percent); coverage is the share of the ROI with image data, the other fractions are of the covered part
+min_coverage_percent = 50
+max_cloud_percent = 40
+max_shadow_percent = 20
+min_water_percent = 30
+
+# Flags counted as cloud
+cloud_flags = ["Dilated_Cloud", "Cirrus", "Cloud"]
+
+# Number of scenes processed at the same time (None uses all available cores)
+max_workers = None
+
+# Catalog decisions loaded in this process, keyed by (sensor, path/row, date)
+decision_cache = {}
+
+def roi_fractions(qa_path, rois=prefilter_rois):
+    # Coverage, cloud, shadow and water percentages of each ROI, from a windowed read of the QA band over the ROI
+    fractions = {}
+    with rasterio.open(qa_path) as src:
+        for key, shapefile_path in rois.items():
+            window, mask = ROI_Masks.roi_window_mask(key, shapefile_path, src.crs, src.transform, (src.height, src.width))
+            roi_pixels = int(np.count_nonzero(mask))
+            if roi_pixels == 0:
+                fractions[key] = {"Coverage_%": 0.0, "Cloud_%": np.nan, "Shadow_%": np.nan, "Water_%": np.nan}
+                continue
+            qa = src.read(1, window=window)[mask]
+            flags = QA_Masks.decode_flags(qa, ["Fill", "Cloud_Shadow", "Water"])
+            covered = ~flags["Fill"]
+            count = int(np.count_nonzero(covered))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                fractions[key] = {
+                    "Coverage_%": 100.0 * count / roi_pixels,
+                    "Cloud_%": 100.0 * np.count_nonzero(QA_Masks.flag_mask(qa, cloud_flags) & covered) / count if count else np.nan,
+                    "Shadow_%": 100.0 * np.count_nonzero(flags["Cloud_Shadow"] & covered) / count if count else np.nan,
+                    "Water_%": 100.0 * np.count_nonzero(flags["Water"] & covered) / count if count else np.nan,
+                }
+    return fractions
+
+def roi_passes(values):
+    # NaN fractions (nothing covered) fail the comparisons
+    return (values["Coverage_%"] >= min_coverage_percent and values["Cloud_%"] <= max_cloud_percent
+            and values["Shadow_%"] <= max_shadow_percent and values["Water_%"] >= min_water_percent)
+
+def passed_rois(fractions, decision=decision_rois):
+    # Decision ROIs that pass the current thresholds
+    return [key for key in decision if key in fractions and roi_passes(fractions[key])]
+
+def row_fractions(row, decision=decision_rois):
+    # Fractions of the decision ROIs from a catalog row (columns "<ROI>_<fraction>")
+    names = ["Coverage_%", "Cloud_%", "Shadow_%", "Water_%"]
+    return {key: {name: row[f"{key}_{name}"] for name in names} for key in decision
+            if all(f"{key}_{name}" in row for name in names)}
+
+def screen_scene(scene_folder, rois=prefilter_rois, decision=decision_rois):
+    # One catalog row: the scene, its fractions in every ROI and the decision at screening time (informational only;
+    # the decision used by the other scripts is recomputed from the fractions with the current thresholds)
+    scene = os.path.basename(scene_folder)
+    try:
+        fractions = roi_fractions(QA_Masks.qa_file_path(scene_folder), rois)
+    except Exception as e:
+        print(f"Error processing {scene}: {e}")
+        return None
+    passed = passed_rois(fractions, decision)
+    row = {"Scene": scene}
+    for key, values in fractions.items():
+        row.update({f"{key}_{name}": round(value, 2) for name, value in values.items()})
+    row["Accepted"] = bool(passed)
+    row["Passed_ROIs"] = ",".join(passed)
+    return row
+
+def read_prefilter(path=prefilter_path):
+    return pd.read_csv(path) if os.path.exists(path) else None
+
+def scene_key(scene_name):
+    # Level-1 product IDs and ACOLITE scene names of the same acquisition share a key
+    scene = Scene_Catalog.parse_scene_name(scene_name)
+    return (scene["sensor"], scene["path_row"], scene["acquired"].date().isoformat()) if scene else None
+
+def load_decisions(path=prefilter_path):
+    # Decisions from the stored fractions and the current thresholds, so a threshold change applies to screened scenes too
+    if path not in decision_cache:
+        df = read_prefilter(path)
+        decision_cache[path] = {} if df is None else {scene_key(row["Scene"]): bool(passed_rois(row_fractions(row)))
+                                                      for row in df.to_dict('records')}
+    return decision_cache[path]
+
+def is_rejected(scene_name, path=prefilter_path):
+    # True only for scenes that were screened and rejected; scenes missing from the catalog are processed
+    return load_decisions(path).get(scene_key(os.path.basename(scene_name))) is False
+
+def main():
+    # Scenes already in the catalog are not screened again
+    df = read_prefilter(prefilter_path)
+    done = set() if df is None else set(df["Scene"])
+    scene_folders = [folder for folder in Scene_Catalog.find_scenes(input_base_dir, kind="dir")
+                     if os.path.basename(folder) not in done]
+    print(f"{len(done)} scene(s) already screened, {len(scene_folders)} to screen")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        rows = [row for row in executor.map(screen_scene, scene_folders) if row]
+
+    if rows:
+        df = pd.concat([df, pd.DataFrame(rows)], ignore_index=True) if df is not None else pd.DataFrame(rows)
+        os.makedirs(os.path.dirname(prefilter_path) or ".", exist_ok=True)
+        df.sort_values("Scene").to_csv(prefilter_path, index=False)
+
+    # Summary with the current thresholds
+    decision_cache.pop(prefilter_path, None)
+    decisions = load_decisions(prefilter_path)
+    print(f"{sum(decisions.values())} of {len(decisions)} scene(s) accepted")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# -----------------------------Header information------------------------------
+# Author: Ali Reza Shahvaran
+# Filename: Temporal_Aggregation.py
+# License: CC BY 4.0
+# ----------------------------------------------------------------------------
+# Description: This script computes the annual, monthly (climatology), seasonal and per-year-month cell statistics in one aggregation job. Each scene is read once per tile and routed into every temporal bucket it belongs to, using the accumulators of "Cell_Statistics.py", so the full set of maps costs a single scan of the archive and no pre-sorted monthly copy of the data is needed.
+# ----------------------------------------------------------------------------
+# Programming Language: Python 3.0
+# Libraries: os, rasterio, collections, concurrent.futures, Cell_Statistics, Chla_Datacube
+# ----------------------------------------------------------------------------
+# Input: Chl-a TIF files in "Chla_Outputs/<year>/<scene>.tif".
+# ----------------------------------------------------------------------------
+# Output: One raster per granularity, statistic and bucket in "Final_Maps/<Granularity>/<Statistic>/<bucket>.tif".
+# ----------------------------------------------------------------------------
+
+import os
+import rasterio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import Cell_Statistics
+from Chla_Datacube import scene_datetime, find_scene_files
+
+# Base directories
+input_base_dir = r"E:\Thesis\Chapter_3\RS_Data\Chla_Outputs"
+output_base_dir = r"E:\Thesis\Chapter_3\RS_Data\Final_Maps"
+
+# Output extent (left, bottom, right, top) in WGS 84 / UTM zone 17N (EPSG:32617)
+extent = (579271.5, 4774252.13214014, 733018.5, 4877647.86785986)
+
+# Operations to perform for every bucket (percentiles such as "MEDIAN" or "P90" add a histogram per bucket and pixel)
+operations = ["MEAN", "MAXIMUM", "STD"]
+
+# Granularities written by the job
+granularities = ["Annual", "Monthly", "Seasonal", "Year_Month"]
+
+# Smaller tiles than Cell_Statistics.py, as every bucket keeps its own accumulators
+tile_size = 256
+
+# Most outputs open at once (the C runtime on Windows allows 512 open files); beyond that the least recently written
+# outputs are closed and reopened in 'r+' mode when their next tile arrives
+max_open_outputs = 240
+
+# Number of tiles processed at the same time (None uses all available cores)
+max_workers = None
+
+seasons = {12: "DJF", 1: "DJF", 2: "DJF", 3: "MAM", 4: "MAM", 5: "MAM",
+           6: "JJA", 7: "JJA", 8: "JJA", 9: "SON", 10: "SON", 11: "SON"}
+
+def scene_buckets(tif_file, selected=granularities):
+    # Every temporal bucket a scene belongs to, as (granularity, bucket) pairs
+    acquired = scene_datetime(tif_file)
+    buckets = {
+        "Annual": f"{acquired.year}",
+        "Monthly": f"{acquired.month:02d}",
+        "Seasonal": seasons[acquired.month],
+        "Year_Month": f"{acquired.year}_{acquired.month:02d}",
+    }
+    return [(granularity, buckets[granularity]) for granularity in selected]
+
+def tile_bucket_statistics(scenes, transform, window, statistics, edges):
+    # Read each scene once and update the accumulators of all of its buckets
+    shape = (window.height, window.width)
+    bounds = Cell_Statistics.tile_bounds(transform, window)
+    percentiles = Cell_Statistics.percentile_names(statistics)
+    accumulators, histograms = {}, {}
+    for tif_file, buckets in scenes:
+        with rasterio.open(tif_file) as src:
+            data = Cell_Statistics.read_tile(src, bounds, shape)
+        for bucket in buckets:
+            if bucket not in accumulators:
+                accumulators[bucket] = Cell_Statistics.init_accumulator(shape)
+                if percentiles:
+                    histograms[bucket] = Cell_Statistics.init_histogram(shape, edges)
+            Cell_Statistics.update_accumulator(accumulators[bucket], data)
+            if percentiles:
+                Cell_Statistics.update_histogram(histograms[bucket], data, edges)
+
+    # Only the requested statistics are sent back to the main process
+    results = {}
+    for bucket, acc in accumulators.items():
+        values = Cell_Statistics.finalize_accumulator(acc)
+        if percentiles:
+            percentile_values = Cell_Statistics.histogram_percentiles(histograms[bucket], edges, percentiles.values())
+            values.update({statistic: percentile_values[percentile] for statistic, percentile in percentiles.items()})
+        results[bucket] = {statistic: values[statistic] for statistic in statistics}
+    return window, results
+
+def output_path(bucket, statistic, base_dir=output_base_dir):
+    granularity, name = bucket
+    return os.path.join(base_dir, granularity, statistic, f"{name}.tif")
+
+def output_handle(handles, path, limit=max_open_outputs):
+    # Open output of a path, reopened in 'r+' mode if it was closed; the least recently used one is closed past the limit
+    if path in handles:
+        handles.move_to_end(path)
+        return handles[path]
+    while len(handles) >= limit:
+        handles.popitem(last=False)[1].close()
+    handles[path] = rasterio.open(path, 'r+')
+    return handles[path]
+
+def aggregate(tif_files, statistics=operations, selected=granularities, base_dir=output_base_dir,
+              set_null_zero=True, workers=max_workers, size=tile_size, limit=max_open_outputs):
+    scenes = [(tif_file, scene_buckets(tif_file, selected)) for tif_file in tif_files]
+    buckets = sorted({bucket for tif_file, scene_bucket_list in scenes for bucket in scene_bucket_list})
+    print(f"{len(tif_files)} scene(s) routed into {len(buckets)} bucket(s)")
+
+    # Every output is created (filled with NoData) and closed first, so only a bounded number is open while writing
+    profile = Cell_Statistics.output_profile(tif_files[0], extent)
+    for bucket in buckets:
+        for statistic in statistics:
+            path = output_path(bucket, statistic, base_dir)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with rasterio.open(path, 'w', **profile):
+                pass
+
+    handles = OrderedDict()
+    try:
+        edges = Cell_Statistics.histogram_edges()
+        windows = list(Cell_Statistics.tile_windows(profile["height"], profile["width"], size))
+        count = len(windows)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(tile_bucket_statistics, [scenes] * count, [profile["transform"]] * count,
+                                   windows, [statistics] * count, [edges] * count)
+            for window, bucket_results in results:
+                # Buckets without a scene covering the tile keep the NoData value of the outputs
+                for bucket, values in bucket_results.items():
+                    for statistic, data in values.items():
+                        dst = output_handle(handles, output_path(bucket, statistic, base_dir), limit)
+                        dst.write(Cell_Statistics.set_null(data, statistic, set_null_zero), 1, window=window)
+    finally:
+        for dst in handles.values():
+            dst.close()
+
+def main():
+    tif_files = find_scene_files(input_base_dir)
+    aggregate(tif_files)
+
+if __name__ == "__main__":
+    main()